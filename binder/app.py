@@ -2,8 +2,8 @@ import os
 import subprocess
 
 import utils
-from coordinate_updater import CoordinateUpdater
 from dialogs import AboutWindow
+from game_state import GameStateHub
 from PyQt6.QtCore import QMargins, QSize, QThread
 from PyQt6.QtGui import QColor, QFont
 from PyQt6.QtWidgets import (QApplication, QHBoxLayout, QLineEdit, QToolTip,
@@ -19,11 +19,11 @@ from binder import Binder
 
 
 class MainApp(DraggableWidget):
-	def __init__(self, app: QApplication, coordinate_updater: CoordinateUpdater):
+	def __init__(self, app: QApplication, game_state: GameStateHub):
 		super().__init__()
 		check_update()
 		self.app = app
-		self.coordinate_updater = coordinate_updater
+		self.game_state = game_state
 		self.binder_running = False
 		self.setWindowTitle('Настройки')
 		self.setup_worker() #/ Ждём фикса pyqttoast под multiline
@@ -202,7 +202,7 @@ class MainApp(DraggableWidget):
 
 	def initiate_binder(self):
 		global binder
-		binder = Binder(coordinate_updater=self.coordinate_updater, app=self)
+		binder = Binder(game_state=self.game_state, app=self)
 		binder.setWindowIcon(self.app.windowIcon())
 		binder.show()
 
@@ -212,6 +212,9 @@ class MainApp(DraggableWidget):
 		if binder:
 			binder.destroy()
 
+	def on_loop_stalled(self, name: str, stalled_for: float):
+		show_notification(parent=self, preset=ToastPreset.WARNING_DARK, text=f"Фоновый цикл {name} завис на {stalled_for:.0f} с и был перезапущен")
+
 	def show_buttons_settings_page(self):
 		self.show_page("buttons_settings_page", ButtonsSettings, title="Настройка кнопок")
 
@@ -1,19 +1,21 @@
-import time
 from datetime import datetime
 from functools import partial
 from typing import TYPE_CHECKING, Union
 
-import binder_utils
-import keyboard
-import pyperclip
-from coordinate_updater import CoordinateUpdater
 from dialogs import GTAModal
-from PyQt6.QtCore import QObject, Qt, QThread, pyqtSignal
+from game_state import GameStateHub, GameStateSnapshot
+from input_executor import input_executor
+from input_pipeline import paste_text, screen_metrics
+from layout import ScreenLayout
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
 from PyQt6.QtWidgets import (QGridLayout, QHBoxLayout, QLayout, QPushButton,
 							 QScrollArea, QVBoxLayout, QWidget)
-from utils import (ADDITIONAL_BUTTONS, DATE_FORMAT, HorizontalScrollArea,
-				   Mouse, configuration, create_button, create_label,
-				   get_reports_count, get_tabs_state)
+from readiness import console_input_probe
+from utils import (ADDITIONAL_BUTTONS, DATE_FORMAT, GeometryBatch,
+				   HorizontalScrollArea, TextDeliveryMode, configuration,
+				   create_button, create_label, get_reports_count,
+				   physical_to_logical)
+from win_events import WinEventListener
 
 if TYPE_CHECKING:
 	from app import MainApp
@@ -64,73 +66,51 @@ class Worker(QObject):
 		super().__init__()
 		self.binder_instance = binder_instance
 		self.signals = WorkerSignals()
-		self._running = True
 
 		self.ui_states: dict[str, bool] = {
 			tab_info.is_ui: False for tab_info in self.tab_name_map.values()
 		}
 
-	def process(self):
-		while self._running:
-			if binder_utils.get_process("GTA5.exe") is None:
-				time.sleep(5)
-				continue
-
-			tabs_state = get_tabs_state(
-				self.binder_instance.right,
-				self.binder_instance.bottom,
-				self.binder_instance.left,
-				self.binder_instance.top,
-			)
-
-			for tab, is_open in tabs_state.items():
-				tab_info = self.tab_name_map.get(tab)
-				if not tab_info:
-					continue
-
-				current_state = self.ui_states.get(tab_info.is_ui, False)
-				if is_open and not current_state:
-					init_signal = getattr(self.signals, tab_info.init_signal, None)
-					if init_signal:
-						init_signal.emit()
-					self.ui_states[tab_info.is_ui] = True
-				elif not is_open and current_state:
-					layout = getattr(self.binder_instance, tab_info.layout, None)
-					if layout:
-						self.signals.clear_layout.emit(layout)
-					self.ui_states[tab_info.is_ui] = False
-
-			time.sleep(0.2)
+	def apply_snapshot(self, snapshot: GameStateSnapshot):
+		self.apply_tabs_state(snapshot.tabs_state)
 
-	def stop(self):
-		self._running = False
+	def apply_tabs_state(self, tabs_state: dict[str, bool]) -> bool:
+		changed = False
+		for tab, is_open in tabs_state.items():
+			tab_info = self.tab_name_map.get(tab)
+			if not tab_info:
+				continue
 
+			current_state = self.ui_states.get(tab_info.is_ui, False)
+			if is_open and not current_state:
+				init_signal = getattr(self.signals, tab_info.init_signal, None)
+				if init_signal:
+					init_signal.emit()
+				self.ui_states[tab_info.is_ui] = True
+				changed = True
+			elif not is_open and current_state:
+				layout = getattr(self.binder_instance, tab_info.layout, None)
+				if layout:
+					self.signals.clear_layout.emit(layout)
+				self.ui_states[tab_info.is_ui] = False
+				changed = True
+		return changed
 
 class Binder(QWidget):
-	def __init__(self, coordinate_updater: CoordinateUpdater, app: 'MainApp'):
+	def __init__(self, game_state: GameStateHub, app: 'MainApp'):
 		super().__init__()
 		self.app = app
-		self.coordinate_updater = coordinate_updater
+		self.game_state = game_state
 
 		self.worker = Worker(self)
-		self.thread = QThread()
-
-		self.worker.moveToThread(self.thread)
 		self._setup_signals()
 
-		self.thread.started.connect(self.worker.process)
-		self.thread.finished.connect(self.worker.stop)
-		self.thread.finished.connect(self.thread.deleteLater)
+		screen_metrics.watch_display_changes()
 
-		self.mouse = Mouse()
-
-		self.left = self.coordinate_updater.left
-		self.top = self.coordinate_updater.top
-		self.right = self.coordinate_updater.right
-		self.bottom = self.coordinate_updater.bottom
-		self.window_width = self.coordinate_updater.window_width
-		self.window_height = self.coordinate_updater.window_height
+		self.screen_layout = ScreenLayout()
+		self.set_window_geometry(self.game_state.snapshot)
 
+		self.geometry_batch = GeometryBatch(self)
 		self.set_fixed_size_and_position()
 
 		self.setWindowTitle("Панель")
@@ -148,9 +128,10 @@ class Binder(QWidget):
 		self.report_labels: list = []
 
 		self.init_ui()
-		self.thread.start()
+		self.game_state.start_detection()
+		self.setup_event_triggers()
 
-		self.coordinate_updater.coordinates_updated.connect(self.update_window_size)
+		self.game_state.snapshot_changed.connect(self.on_snapshot_changed)
 
 	def _setup_signals(self):
 		self.worker.signals.clear_layout.connect(self.clear_layout)
@@ -159,34 +140,54 @@ class Binder(QWidget):
 		self.worker.signals.init_teleport_ui.connect(self.init_teleport_ui)
 		self.worker.signals.init_additional_ui.connect(self.init_additional_ui)
 
+	def setup_event_triggers(self):
+		self.game_events = None
+		self.update_event_triggers(self.game_state.snapshot.running)
+
+	def update_event_triggers(self, game_running: bool):
+		# Focus changes only matter while the game runs. The console key is left to
+		# polling: a keyboard hook would run Python on every keystroke system-wide
+		if not configuration.settings_config.detection.event_triggers:
+			return
+		if game_running and self.game_events is None:
+			self.game_events = WinEventListener()
+			self.game_events.foreground_changed.connect(self.on_foreground_changed, Qt.ConnectionType.DirectConnection)
+			self.game_events.start()
+		elif not game_running and self.game_events is not None:
+			self.game_events.stop()
+			self.game_events = None
+
+	def on_foreground_changed(self, hwnd):
+		self.game_state.poll_scheduler.trigger()
+
+	def on_snapshot_changed(self, snapshot: GameStateSnapshot):
+		# Geometry first, so tab UI built for this snapshot lands on the new position
+		self.update_window_size(snapshot)
+		self.worker.apply_snapshot(snapshot)
+		self.update_event_triggers(snapshot.running)
+
+	def set_window_geometry(self, snapshot: GameStateSnapshot):
+		self.left = snapshot.left
+		self.top = snapshot.top
+		self.right = snapshot.right
+		self.bottom = snapshot.bottom
+		self.window_width = snapshot.window_width
+		self.window_height = snapshot.window_height
+		if not self.screen_layout.matches(snapshot):
+			self.screen_layout = ScreenLayout.from_snapshot(snapshot)
+
+	def get_overlay_geometry(self) -> tuple[int, int, int, int]:
+		# Qt places windows in device-independent pixels, the layout is in physical ones
+		return physical_to_logical(*self.screen_layout.overlay_rect)
+
 	def set_fixed_size_and_position(self):
-		self.setFixedSize(max(0, self.window_width - 999), 430)
-		self.move(self.left + 989, self.top - 13)
+		x, y, width, height = self.get_overlay_geometry()
+		self.setFixedSize(width, height)
+		self.move(x, y)
 
-	def update_window_size(
-		self,
-		left: int,
-		top: int,
-		right: int,
-		bottom: int,
-		width: int,
-		height: int,
-	):
-		new_width = width - 999
-		if self.width() != new_width:
-			self.setFixedSize(new_width, 430)
-
-		new_x = left + 989
-		new_y = top - 13
-		if self.x() != new_x or self.y() != new_y:
-			self.move(new_x, new_y)
-
-		self.left = left
-		self.top = top
-		self.right = right
-		self.bottom = bottom
-		self.window_width = width
-		self.window_height = height
+	def update_window_size(self, snapshot: GameStateSnapshot):
+		self.set_window_geometry(snapshot)
+		self.geometry_batch.request(*self.get_overlay_geometry())
 
 	def init_ui(self):
 		self.main_layout = QHBoxLayout()
@@ -318,20 +319,21 @@ class Binder(QWidget):
 			or self.report_buttons.get(self.sender(), {}).get("text")
 			or ""
 		)
-		position = self.mouse.get_position()
 		now = datetime.now()
 		start_date = datetime(now.year, 4, 1, 7)
 		end_date = datetime(now.year, 4, 2, 7)
-		y_position = self.top + 345 if start_date <= now < end_date else self.top + 330
-		self.mouse.click((self.left + 245, y_position))
-		pyperclip.copy(text_to_copy)
-		pyperclip.copy(text_to_copy)  # На всякий случай
-		keyboard.send("ctrl+v")
-
-		if configuration.settings_config.auto_send.reports:
-			keyboard.send("enter")
+		paste = partial(
+			paste_text,
+			text_to_copy,
+			field=self.screen_layout.report_input_april if start_date <= now < end_date else self.screen_layout.report_input,
+			submit=configuration.settings_config.auto_send.reports,
+			clear=False,
+			delivery=configuration.settings_config.text_delivery.reports,
+		)
+		input_executor.submit("report", paste, on_finished=self.on_report_sent)
 
-		self.mouse.move(position)
+	def on_report_sent(self):
+		self.game_state.poll_scheduler.burst()
 		self.update_click_data()
 
 	def handle_teleport_button_click(self, button_type: str | None = None):
@@ -340,13 +342,12 @@ class Binder(QWidget):
 			or self.teleport_buttons.get(self.sender(), {}).get("coords")
 			or ""
 		)
-		position = self.mouse.get_position()
-		self.paste_to_console(text=f"tpc {text_to_copy}")
-
-		if configuration.settings_config.auto_send.teleports:
-			keyboard.send("enter")
-			self.mouse.click((self.left + 370, self.top + 365))
-			self.mouse.move(position)
+		self.paste_to_console(
+			text=f"tpc {text_to_copy}",
+			submit=configuration.settings_config.auto_send.teleports,
+			confirm=self.screen_layout.teleport_sent,
+			delivery=configuration.settings_config.text_delivery.teleports,
+		)
 
 	def handle_additional_button_click(self, button_type: str | None = None) -> None:
 		button = self.sender()
@@ -372,46 +373,45 @@ class Binder(QWidget):
 			case "punish":
 				violation_data = self.violation_buttons.get(button, {})
 				self.gta_modal = GTAModal(
-					coordinate_updater=self.coordinate_updater,
+					game_state=self.game_state,
 					command_name=button_type or button_name,
 					time=violation_data.get("time"),
 					reason=violation_data.get("reason"),
 				)
 			case "uncuff":
 				self.gta_modal = GTAModal(
-					coordinate_updater=self.coordinate_updater,
+					game_state=self.game_state,
 					command_name=button_name,
 					reason=configuration.settings_config.default_reasons.uncuff,
 				)
 			case "mute_report":
 				self.gta_modal = GTAModal(
-					coordinate_updater=self.coordinate_updater,
+					game_state=self.game_state,
 					command_name=button_name,
 					reason=configuration.settings_config.default_reasons.mute_report,
 				)
 			case "force_rename":
 				self.gta_modal = GTAModal(
-					coordinate_updater=self.coordinate_updater,
+					game_state=self.game_state,
 					command_name=button_name,
 					reason=configuration.settings_config.default_reasons.force_rename,
 				)
 			case _:
 				self.gta_modal = GTAModal(
-					coordinate_updater=self.coordinate_updater,
+					game_state=self.game_state,
 					command_name=button_name,
 				)
 
 		self.gta_modal.show()
 
 	def process_fast_button_click(self, button_name: str):
-		position = self.mouse.get_position()
 		command = button_name if button_name == "reof" else f"{button_name} {configuration.settings_config.user_gid}"
-		self.paste_to_console(text=command)
-
-		if configuration.settings_config.auto_send.commands:
-			keyboard.send("enter")
-			self.mouse.click((self.left + 290, self.top + 365))
-			self.mouse.move(position)
+		self.paste_to_console(
+			text=command,
+			submit=configuration.settings_config.auto_send.commands,
+			confirm=self.screen_layout.command_sent,
+			delivery=configuration.settings_config.text_delivery.commands,
+		)
 
 	@classmethod
 	def clear_layout(cls, layout_or_widget: Union[QLayout, HorizontalScrollArea]):
@@ -452,17 +452,24 @@ class Binder(QWidget):
 		self.worker.signals.init_reports_ui.disconnect()
 		self.worker.signals.init_teleport_ui.disconnect()
 		self.worker.signals.init_additional_ui.disconnect()
-		self.worker.stop()
-		self.thread.quit()
-		self.thread.wait()
+		if self.game_events:
+			self.game_events.stop()
+		self.game_state.snapshot_changed.disconnect(self.on_snapshot_changed)
+		self.game_state.stop_detection()
 		self.app.stop_binder()
 		super().closeEvent(event)
 
-	def paste_to_console(self, text: str):
-		self.mouse.click((self.left + 55, self.top + 375))
-		time.sleep(0.1)
-		self.mouse.click((self.left + 500, self.top + 335))
-		keyboard.send("ctrl+a, backspace")
-		pyperclip.copy(text)
-		keyboard.send("ctrl+v")
-		time.sleep(0.1)
+	def paste_to_console(self, text: str, submit: bool = False, confirm: tuple[int, int] | None = None, delivery: TextDeliveryMode = "clipboard"):
+		paste = partial(
+			paste_text,
+			text,
+			field=self.screen_layout.console_input,
+			tab=self.screen_layout.console_tab,
+			submit=submit,
+			confirm=confirm,
+			settle=configuration.settings_config.input.tab_settle,
+			ready=console_input_probe(self.screen_layout),
+			ready_timeout=configuration.settings_config.input.ready_timeout,
+			delivery=delivery,
+		)
+		input_executor.submit("console", paste, on_finished=self.game_state.poll_scheduler.burst)
@@ -0,0 +1,373 @@
+import threading
+from abc import ABC, abstractmethod
+from ctypes import (Structure, byref, c_int32, c_ubyte, c_uint16, c_uint32,
+					c_void_p, sizeof)
+from pathlib import Path
+
+import numpy as np
+
+try:
+	from ctypes import windll
+except ImportError:  # Not Windows: only FakeCaptureBackend is available
+	windll = None
+
+SRCCOPY = 0x00CC0020
+DIB_RGB_COLORS = 0
+BI_RGB = 0
+CLR_INVALID = 0xFFFFFFFF
+
+
+class BITMAPINFOHEADER(Structure):
+	_fields_ = [
+		("biSize", c_uint32),
+		("biWidth", c_int32),
+		("biHeight", c_int32),
+		("biPlanes", c_uint16),
+		("biBitCount", c_uint16),
+		("biCompression", c_uint32),
+		("biSizeImage", c_uint32),
+		("biXPelsPerMeter", c_int32),
+		("biYPelsPerMeter", c_int32),
+		("biClrUsed", c_uint32),
+		("biClrImportant", c_uint32),
+	]
+
+
+class BITMAPINFO(Structure):
+	_fields_ = [("bmiHeader", BITMAPINFOHEADER), ("bmiColors", c_uint32 * 3)]
+
+
+if windll is not None:
+	user32 = windll.user32
+	gdi32 = windll.gdi32
+
+	user32.GetDC.restype = c_void_p
+	user32.GetDC.argtypes = [c_void_p]
+	user32.ReleaseDC.argtypes = [c_void_p, c_void_p]
+	gdi32.GetPixel.restype = c_uint32
+	gdi32.GetPixel.argtypes = [c_void_p, c_int32, c_int32]
+	gdi32.CreateCompatibleDC.restype = c_void_p
+	gdi32.CreateCompatibleDC.argtypes = [c_void_p]
+	gdi32.CreateDIBSection.restype = c_void_p
+	gdi32.CreateDIBSection.argtypes = [c_void_p, c_void_p, c_uint32, c_void_p, c_void_p, c_uint32]
+	gdi32.SelectObject.restype = c_void_p
+	gdi32.SelectObject.argtypes = [c_void_p, c_void_p]
+	gdi32.DeleteObject.argtypes = [c_void_p]
+	gdi32.DeleteDC.argtypes = [c_void_p]
+	gdi32.BitBlt.argtypes = [c_void_p, c_int32, c_int32, c_int32, c_int32, c_void_p, c_int32, c_int32, c_uint32]
+
+
+def get_points_rect(xs: np.ndarray, ys: np.ndarray) -> tuple[int, int, int, int]:
+	"""
+	Get the bounding box of a set of screen points.
+	Args:
+	- xs (np.ndarray): Screen X-coordinates.
+	- ys (np.ndarray): Screen Y-coordinates.
+	Returns:
+	- tuple[int, int, int, int]: Left, top, width and height of the box.
+	"""
+	min_x, max_x = int(xs.min()), int(xs.max())
+	min_y, max_y = int(ys.min()), int(ys.max())
+	return min_x, min_y, max_x - min_x + 1, max_y - min_y + 1
+
+
+class Frame:
+	"""
+	A captured screen region.
+	Attributes:
+	- left (int): Screen X-coordinate of the first column.
+	- top (int): Screen Y-coordinate of the first row.
+	- pixels (np.ndarray): Array of shape (height, width, 4) in BGRA order.
+	"""
+	__slots__ = ('left', 'top', 'pixels')
+
+	def __init__(self, left: int, top: int, pixels: np.ndarray):
+		self.left = left
+		self.top = top
+		self.pixels = pixels
+
+	@property
+	def width(self) -> int:
+		return self.pixels.shape[1]
+
+	@property
+	def height(self) -> int:
+		return self.pixels.shape[0]
+
+	def contains(self, x: int, y: int) -> bool:
+		return self.left <= x < self.left + self.width and self.top <= y < self.top + self.height
+
+	def get_pixel(self, x: int, y: int) -> tuple[int, int, int]:
+		"""
+		Get the color of a screen pixel from the frame.
+		Args:
+		- x (int): Screen X-coordinate.
+		- y (int): Screen Y-coordinate.
+		Returns:
+		- tuple[int, int, int]: RGB color of the pixel.
+		"""
+		b, g, r = self.pixels[y - self.top, x - self.left, :3]
+		return int(r), int(g), int(b)
+
+	def get_pixels(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+		"""
+		Get the colors of several screen pixels from the frame.
+		Args:
+		- xs (np.ndarray): Screen X-coordinates.
+		- ys (np.ndarray): Screen Y-coordinates.
+		Returns:
+		- np.ndarray: Array of shape (len(xs), 3) with RGB colors.
+		"""
+		return self.pixels[ys - self.top, xs - self.left, 2::-1]
+
+
+class CaptureBackend(ABC):
+	"""
+	Source of screen pixels for tab detection.
+
+	Subclasses implement `capture`; `read_pixels` defaults to a single capture of
+	the points' bounding box, which is what the detector calls once per tick.
+	Backends that read pixels one by one set `batched` to False.
+	"""
+	name = ""
+	batched = True
+
+	def __init__(self):
+		# Captures share one buffer, so concurrent reads are serialized
+		self._lock = threading.Lock()
+		# Frame behind the last read_pixels call; it shares the buffer, so it is only valid until the next capture
+		self.last_frame: Frame | None = None
+
+	@abstractmethod
+	def capture(self, left: int, top: int, width: int, height: int) -> Frame:
+		...
+
+	def read_pixels(self, xs: np.ndarray, ys: np.ndarray, rect: tuple[int, int, int, int] | None = None) -> np.ndarray:
+		"""
+		Read the colors of several screen pixels.
+		Args:
+		- xs (np.ndarray): Screen X-coordinates.
+		- ys (np.ndarray): Screen Y-coordinates.
+		- rect (tuple[int, int, int, int] | None): Precomputed bounding box of the points.
+		Returns:
+		- np.ndarray: Array of shape (len(xs), 3) with RGB colors.
+		"""
+		with self._lock:
+			frame = self.capture(*(rect or get_points_rect(xs, ys)))
+			self.last_frame = frame
+			return frame.get_pixels(xs, ys)
+
+	def release(self) -> None:
+		pass
+
+
+class GdiPixelBackend(CaptureBackend):
+	"""
+	Reads every pixel with its own GetPixel call. Kept as a reference backend.
+	"""
+	name = "gdi"
+	batched = False
+
+	def __init__(self):
+		if windll is None:
+			raise OSError("GDI capture is only available on Windows")
+		super().__init__()
+
+	@staticmethod
+	def _to_rgb(pixel: int) -> tuple[int, int, int]:
+		if pixel == CLR_INVALID:
+			raise OSError("GetPixel failed")
+		return (pixel & 0xFF, (pixel >> 8) & 0xFF, (pixel >> 16) & 0xFF)
+
+	def read_pixels(self, xs: np.ndarray, ys: np.ndarray, rect: tuple[int, int, int, int] | None = None) -> np.ndarray:
+		screen_dc = user32.GetDC(None)
+		try:
+			colors = [self._to_rgb(gdi32.GetPixel(screen_dc, int(x), int(y))) for x, y in zip(xs, ys)]
+		finally:
+			user32.ReleaseDC(None, screen_dc)
+		return np.array(colors, dtype=np.uint8).reshape(-1, 3)
+
+	def capture(self, left: int, top: int, width: int, height: int) -> Frame:
+		pixels = np.empty((height, width, 4), dtype=np.uint8)
+		pixels[..., 3] = 255
+		screen_dc = user32.GetDC(None)
+		try:
+			for row in range(height):
+				for column in range(width):
+					r, g, b = self._to_rgb(gdi32.GetPixel(screen_dc, left + column, top + row))
+					pixels[row, column, :3] = (b, g, r)
+		finally:
+			user32.ReleaseDC(None, screen_dc)
+		return Frame(left, top, pixels)
+
+
+class BlitCaptureBackend(CaptureBackend):
+	"""
+	Captures a screen rectangle with a single BitBlt into a reusable DIB section.
+
+	The memory DC and bitmap are kept between captures and only recreated when
+	the requested size changes, so a steady poll does one GDI blit per tick
+	without any allocations.
+	"""
+	name = "blit"
+
+	def __init__(self):
+		if windll is None:
+			raise OSError("GDI capture is only available on Windows")
+		super().__init__()
+		self._memory_dc = None
+		self._bitmap = None
+		self._previous_bitmap = None
+		self._pixels: np.ndarray | None = None
+
+	def _allocate(self, width: int, height: int) -> None:
+		self.release()
+		bitmap_info = BITMAPINFO()
+		header = bitmap_info.bmiHeader
+		header.biSize = sizeof(BITMAPINFOHEADER)
+		header.biWidth = width
+		header.biHeight = -height  # top-down rows
+		header.biPlanes = 1
+		header.biBitCount = 32
+		header.biCompression = BI_RGB
+
+		bits = c_void_p()
+		self._memory_dc = gdi32.CreateCompatibleDC(None)
+		self._bitmap = gdi32.CreateDIBSection(self._memory_dc, byref(bitmap_info), DIB_RGB_COLORS, byref(bits), None, 0)
+		if not self._bitmap or not bits.value:
+			self.release()
+			raise OSError("CreateDIBSection failed")
+		self._previous_bitmap = gdi32.SelectObject(self._memory_dc, self._bitmap)
+		raw = (c_ubyte * (width * height * 4)).from_address(bits.value)
+		self._pixels = np.frombuffer(raw, dtype=np.uint8).reshape(height, width, 4)
+
+	def capture(self, left: int, top: int, width: int, height: int) -> Frame:
+		"""
+		Capture a screen rectangle.
+		Args:
+		- left (int): Screen X-coordinate of the rectangle.
+		- top (int): Screen Y-coordinate of the rectangle.
+		- width (int): Width of the rectangle.
+		- height (int): Height of the rectangle.
+		Returns:
+		- Frame: The captured region. Its pixel buffer is reused by the next capture.
+		"""
+		if width <= 0 or height <= 0:
+			raise ValueError("Capture rectangle is empty")
+		if self._pixels is None or self._pixels.shape[:2] != (height, width):
+			self._allocate(width, height)
+
+		screen_dc = user32.GetDC(None)
+		try:
+			if not gdi32.BitBlt(self._memory_dc, 0, 0, width, height, screen_dc, left, top, SRCCOPY):
+				raise OSError("BitBlt failed")
+			gdi32.GdiFlush()
+		finally:
+			user32.ReleaseDC(None, screen_dc)
+		return Frame(left, top, self._pixels)
+
+	def release(self) -> None:
+		if self._memory_dc:
+			if self._previous_bitmap:
+				gdi32.SelectObject(self._memory_dc, self._previous_bitmap)
+			gdi32.DeleteDC(self._memory_dc)
+		if self._bitmap:
+			gdi32.DeleteObject(self._bitmap)
+		self._memory_dc = None
+		self._bitmap = None
+		self._previous_bitmap = None
+		self._pixels = None
+
+	def __del__(self):
+		self.release()
+
+
+class FakeCaptureBackend(CaptureBackend):
+	"""
+	Serves pixels from an in-memory image, for benchmarks and tests off Windows.
+	Attributes:
+	- left (int): Screen X-coordinate the image is placed at.
+	- top (int): Screen Y-coordinate the image is placed at.
+	- capture_count (int): Number of captures served so far.
+	"""
+	name = "fake"
+
+	def __init__(self, pixels: np.ndarray, left: int = 0, top: int = 0):
+		super().__init__()
+		self._buffer: np.ndarray | None = None
+		self.capture_count = 0
+		self.left = left
+		self.top = top
+		self.set_pixels(pixels)
+
+	@classmethod
+	def from_png(cls, path: str | Path, left: int = 0, top: int = 0) -> 'FakeCaptureBackend':
+		from PyQt6.QtGui import QImage
+
+		image = QImage(str(path))
+		if image.isNull():
+			raise ValueError(f"Unable to load image: {path}")
+		image = image.convertToFormat(QImage.Format.Format_RGB32)
+		data = image.constBits()
+		data.setsize(image.sizeInBytes())
+		rows = np.frombuffer(data, dtype=np.uint8).reshape(image.height(), image.bytesPerLine())
+		bgra = rows[:, :image.width() * 4].reshape(image.height(), image.width(), 4)
+		return cls(bgra[..., 2::-1], left, top)
+
+	def set_pixels(self, pixels: np.ndarray, left: int | None = None, top: int | None = None) -> None:
+		"""
+		Replace the served image.
+		Args:
+		- pixels (np.ndarray): Array of shape (height, width, 3) or (height, width, 4) in RGB(A) order.
+		- left (int | None): New screen X-coordinate of the image.
+		- top (int | None): New screen Y-coordinate of the image.
+		"""
+		pixels = np.asarray(pixels, dtype=np.uint8)
+		if pixels.ndim != 3 or pixels.shape[2] not in (3, 4):
+			raise ValueError("Expected an array of shape (height, width, 3 or 4)")
+		bgra = np.empty((*pixels.shape[:2], 4), dtype=np.uint8)
+		bgra[..., :3] = pixels[..., 2::-1]
+		bgra[..., 3] = 255
+		self._pixels = bgra
+		if left is not None:
+			self.left = left
+		if top is not None:
+			self.top = top
+
+	def capture(self, left: int, top: int, width: int, height: int) -> Frame:
+		if width <= 0 or height <= 0:
+			raise ValueError("Capture rectangle is empty")
+		if self._buffer is None or self._buffer.shape[:2] != (height, width):
+			self._buffer = np.empty((height, width, 4), dtype=np.uint8)
+		self._buffer[...] = 0
+
+		source_height, source_width = self._pixels.shape[:2]
+		x0, y0 = max(left, self.left), max(top, self.top)
+		x1 = min(left + width, self.left + source_width)
+		y1 = min(top + height, self.top + source_height)
+		if x0 < x1 and y0 < y1:
+			self._buffer[y0 - top:y1 - top, x0 - left:x1 - left] = (
+				self._pixels[y0 - self.top:y1 - self.top, x0 - self.left:x1 - self.left]
+			)
+		self.capture_count += 1
+		return Frame(left, top, self._buffer)
+
+
+CAPTURE_BACKENDS: dict[str, type[CaptureBackend]] = {
+	GdiPixelBackend.name: GdiPixelBackend,
+	BlitCaptureBackend.name: BlitCaptureBackend,
+}
+
+
+def create_capture_backend(name: str) -> CaptureBackend:
+	"""
+	Create the capture backend configured in the detection settings.
+	Args:
+	- name (str): Backend name, one of CAPTURE_BACKENDS.
+	Returns:
+	- CaptureBackend: New backend instance.
+	"""
+	backend_class = CAPTURE_BACKENDS.get(name)
+	if backend_class is None:
+		raise ValueError(f"Unknown capture backend {name!r}, expected one of: {', '.join(CAPTURE_BACKENDS)}")
+	return backend_class()
@@ -1,72 +1,293 @@
-import time
-from hmac import new
+import os
+from ctypes import POINTER, byref
+from ctypes import wintypes
+from dataclasses import dataclass
+from typing import Iterable
 
-import binder_utils
-from PyQt6.QtCore import QThread, pyqtSignal
+import psutil
+from PyQt6.QtCore import QObject, Qt, pyqtSignal
+from win_events import (EVENT_OBJECT_LOCATIONCHANGE, EVENT_SYSTEM_FOREGROUND,
+						EVENT_SYSTEM_MINIMIZEEND, WinEventListener)
 
+try:
+	from ctypes import WINFUNCTYPE, windll
+except ImportError:  # Not Windows: no game windows are ever found
+	from ctypes import CFUNCTYPE as WINFUNCTYPE
+	windll = None
 
-class CoordinateUpdater(QThread):
-	coordinates_updated = pyqtSignal(int, int, int, int, int, int)
+GW_OWNER = 4
+GA_ROOT = 2
+DEFAULT_DPI = 96
+OWN_PROCESS_ID = os.getpid()
+
+WNDENUMPROC = WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+
+if windll is not None:
+	user32 = windll.user32
+
+	user32.EnumWindows.argtypes = [WNDENUMPROC, wintypes.LPARAM]
+	user32.GetWindowThreadProcessId.restype = wintypes.DWORD
+	user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, POINTER(wintypes.DWORD)]
+	user32.IsWindow.argtypes = [wintypes.HWND]
+	user32.IsWindowVisible.argtypes = [wintypes.HWND]
+	user32.IsIconic.argtypes = [wintypes.HWND]
+	user32.GetWindow.restype = wintypes.HWND
+	user32.GetWindow.argtypes = [wintypes.HWND, wintypes.UINT]
+	user32.GetAncestor.restype = wintypes.HWND
+	user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+	user32.GetWindowRect.argtypes = [wintypes.HWND, POINTER(wintypes.RECT)]
+	user32.GetClientRect.argtypes = [wintypes.HWND, POINTER(wintypes.RECT)]
+	user32.ClientToScreen.argtypes = [wintypes.HWND, POINTER(wintypes.POINT)]
+	user32.GetForegroundWindow.restype = wintypes.HWND
+	user32.GetDpiForWindow.restype = wintypes.UINT
+	user32.GetDpiForWindow.argtypes = [wintypes.HWND]
+
+
+class WindowEventSource(QObject):
+	"""
+	Tells GameStateHub that a game window may have moved, been resized or focused.
+	The base class never fires, which leaves GameStateHub on its fallback poll.
+	Signals:
+	- location_changed(object): Handle of the window the event is about.
+	"""
+	location_changed = pyqtSignal(object)
+
+	def track(self, process_ids: Iterable[int]) -> None:
+		pass
+
+	def stop(self) -> None:
+		pass
+
+
+class WinEventWindowSource(WindowEventSource):
+	"""
+	Listens for location-change and focus WinEvents of every game process.
+	"""
+	events = (EVENT_OBJECT_LOCATIONCHANGE, EVENT_SYSTEM_MINIMIZEEND, EVENT_SYSTEM_FOREGROUND)
 
 	def __init__(self):
 		super().__init__()
-		self._running = True
-		self.left = 0
-		self.top = 0
-		self.right = 0
-		self.bottom = 0
-		self.window_width = 0
-		self.window_height = 0
-
-	def update_coordinates(self, process):
-		left, top, right, bottom = binder_utils.get_window_coordinates(process[0])
-		if binder_utils.has_border(process[0]):
-			left += 8
-			top += 31
-			right -= 9
-			bottom -= 9
-		self.window_width = right - left
-		self.window_height = bottom - top
-		return left, top, right, bottom
-
-	def run(self):
-		while self._running:
+		self._listeners: dict[int, WinEventListener] = {}
+
+	def track(self, process_ids: Iterable[int]) -> None:
+		process_ids = set(process_ids)
+		for process_id in self._listeners.keys() - process_ids:
+			self._listeners.pop(process_id).stop()
+		for process_id in process_ids - self._listeners.keys():
+			listener = WinEventListener(win_events=self.events, process_id=process_id)
+			listener.win_event.connect(self._on_win_event, Qt.ConnectionType.DirectConnection)
+			listener.start()
+			self._listeners[process_id] = listener
+
+	def _on_win_event(self, event: int, hwnd):
+		self.location_changed.emit(hwnd)
+
+	def stop(self) -> None:
+		for listener in self._listeners.values():
+			listener.stop()
+		self._listeners.clear()
+
+
+class FakeWindowEventSource(WindowEventSource):
+	"""
+	Event source driven by hand, for tests.
+	"""
+
+	def __init__(self):
+		super().__init__()
+		self.tracked_process_ids: set[int] = set()
+
+	def track(self, process_ids: Iterable[int]) -> None:
+		self.tracked_process_ids = set(process_ids)
+
+	def fire(self, hwnd: int = 0) -> None:
+		self.location_changed.emit(hwnd)
+
+	def stop(self) -> None:
+		self.tracked_process_ids = set()
+
+
+@dataclass(frozen=True)
+class GameWindow:
+	"""
+	Screen geometry of one game window.
+
+	The rectangle is the client area, so the border adjustment comes from the window's
+	own metrics rather than fixed offsets. `border` is the thickness of the frame
+	(left, top, right, bottom) around it, all zero for a borderless game.
+	"""
+	hwnd: int
+	process_id: int
+	left: int
+	top: int
+	right: int
+	bottom: int
+	dpi: int = DEFAULT_DPI
+	border: tuple[int, int, int, int] = (0, 0, 0, 0)
+
+	@property
+	def window_rect(self) -> tuple[int, int, int, int]:
+		return self.left, self.top, self.right, self.bottom
+
+	@property
+	def scale(self) -> float:
+		return self.dpi / DEFAULT_DPI
+
+
+def get_game_window(hwnd: int, process_id: int) -> GameWindow | None:
+	"""
+	Read the client-area geometry, DPI and border metrics of a window.
+
+	Args:
+	- hwnd (int): Window handle.
+	- process_id (int): Process owning the window.
+
+	Returns:
+	- GameWindow | None: The geometry, or None for a closed, hidden or minimized window.
+	"""
+	if not user32.IsWindow(hwnd) or not user32.IsWindowVisible(hwnd) or user32.IsIconic(hwnd):
+		return None
+	client = wintypes.RECT()
+	frame = wintypes.RECT()
+	origin = wintypes.POINT(0, 0)
+	if not user32.GetClientRect(hwnd, byref(client)) or not user32.GetWindowRect(hwnd, byref(frame)):
+		return None
+	if client.right <= 0 or client.bottom <= 0 or not user32.ClientToScreen(hwnd, byref(origin)):
+		return None
+	left, top = origin.x, origin.y
+	right, bottom = left + client.right, top + client.bottom
+	try:
+		dpi = user32.GetDpiForWindow(hwnd) or DEFAULT_DPI
+	except AttributeError:  # Before Windows 10 1607
+		dpi = DEFAULT_DPI
+	return GameWindow(
+		hwnd=hwnd,
+		process_id=process_id,
+		left=left,
+		top=top,
+		right=right,
+		bottom=bottom,
+		dpi=dpi,
+		border=(left - frame.left, top - frame.top, frame.right - right, frame.bottom - bottom),
+	)
+
+
+class GameWindowTracker:
+	"""
+	Keeps the geometry of every visible top-level window of the game executable.
+
+	`refresh()` enumerates all top-level windows; `refresh(hwnds)` only re-reads the
+	given ones, which is what location-change events need. Whether a process is the
+	game is looked up once per process id, until `forget_processes` is called.
+	"""
+
+	def __init__(self, executable: str):
+		self.executable = executable.lower()
+		self.windows: dict[int, GameWindow] = {}
+		self._focused_hwnd: int | None = None
+		self._is_game: dict[int, bool] = {}
+
+	@property
+	def process_ids(self) -> set[int]:
+		return {window.process_id for window in self.windows.values()}
+
+	def _is_game_process(self, process_id: int) -> bool:
+		is_game = self._is_game.get(process_id)
+		if is_game is None:
 			try:
-				process = binder_utils.get_process("GTA5.exe")
-				if process is not None:
-					new_left, new_top, new_right, new_bottom = self.update_coordinates(process)
-					if (
-						(new_left, new_top, new_right, new_bottom) != (self.left, self.top, self.right, self.bottom)
-						or self.window_width != self.right - self.left
-						or self.window_height != self.bottom - self.top
-					):
-						self.left, self.top, self.right, self.bottom = new_left, new_top, new_right, new_bottom
-						self.coordinates_updated.emit(self.left, self.top, self.right, self.bottom, self.window_width, self.window_height)
-
-				time.sleep(1.5)
-			except Exception as e:
-				print(e)
-
-	def stop(self):
-		self._running = False
-		self.wait()
-
-	# def autologin(self):
-	# 	from utils import configuration
-
-	# 	binder_utils.keyboard_press("t")
-	# 	time.sleep(0.5)
-	# 	binder_utils.keyboard_press('ctrl+a backspace')
-	# 	binder_utils.keyboard_send('/alogin13')
-	# 	time.sleep(0.5)
-	# 	binder_utils.keyboard_press("enter")
-	# 	time.sleep(0.5)
-	# 	binder_utils.keyboard_press("`")
-	# 	time.sleep(0.5)
-	# 	binder_utils.mouse_click((self.left+80, self.top+380))
-	# 	binder_utils.keyboard_send(configuration.password)
-	# 	time.sleep(0.5)
-	# 	binder_utils.keyboard_send('hp')
-	# 	time.sleep(1)
-	# 	binder_utils.keyboard_send('fly')
-	# 	binder_utils.keyboard_press("`")
+				is_game = psutil.Process(process_id).name().lower() == self.executable
+			except psutil.Error:
+				is_game = False
+			self._is_game[process_id] = is_game
+		return is_game
+
+	def forget_processes(self) -> None:
+		# A process id seen before may now belong to a newly started game
+		self._is_game.clear()
+
+	def _get_process_id(self, hwnd: int) -> int:
+		process_id = wintypes.DWORD()
+		user32.GetWindowThreadProcessId(hwnd, byref(process_id))
+		return process_id.value
+
+	def _enumerate(self) -> list[tuple[int, int]]:
+		found = []
+		seen = set()
+
+		def on_window(hwnd, _):
+			if user32.GetWindow(hwnd, GW_OWNER):
+				return True
+			process_id = self._get_process_id(hwnd)
+			seen.add(process_id)
+			if self._is_game_process(process_id):
+				found.append((hwnd, process_id))
+			return True
+
+		user32.EnumWindows(WNDENUMPROC(on_window), 0)
+		# Drop processes that no longer own a window, so the cache stays bounded
+		self._is_game = {process_id: is_game for process_id, is_game in self._is_game.items() if process_id in seen}
+		return found
+
+	def refresh(self, hwnds: Iterable[int] | None = None) -> bool:
+		"""
+		Re-read window geometry.
+
+		Args:
+		- hwnds (Iterable[int] | None): Windows to re-read; every game window when None.
+
+		Returns:
+		- bool: True if any window appeared, disappeared or changed.
+		"""
+		if windll is None:
+			return False
+		if hwnds is None:
+			candidates = self._enumerate()
+			windows = {}
+		else:
+			candidates = []
+			# Events can name a child window; a destroyed window has no ancestor and is kept as is
+			roots = dict.fromkeys(user32.GetAncestor(hwnd, GA_ROOT) or hwnd for hwnd in hwnds if hwnd)
+			for hwnd in roots:
+				if (window := self.windows.get(hwnd)) is not None:
+					candidates.append((hwnd, window.process_id))
+				elif not user32.GetWindow(hwnd, GW_OWNER):
+					# A game window that appeared since the last full scan, e.g. a second client gaining focus
+					process_id = self._get_process_id(hwnd)
+					if self._is_game_process(process_id):
+						candidates.append((hwnd, process_id))
+			windows = dict(self.windows)
+		for hwnd, process_id in candidates:
+			window = get_game_window(hwnd, process_id)
+			if window is None:
+				windows.pop(hwnd, None)
+			else:
+				windows[hwnd] = window
+		changed = windows != self.windows
+		self.windows = windows
+		return changed
+
+	def is_active(self, window: GameWindow) -> bool:
+		"""
+		Whether the window shows the game: it is neither minimized nor hidden, and it or
+		one of the binder's own windows (the overlay takes the focus when clicked) is in
+		the foreground.
+		"""
+		if windll is None:
+			return True
+		if user32.IsIconic(window.hwnd) or not user32.IsWindowVisible(window.hwnd):
+			return False
+		foreground = user32.GetForegroundWindow()
+		return foreground == window.hwnd or bool(foreground) and self._get_process_id(foreground) == OWN_PROCESS_ID
+
+	def focused(self) -> GameWindow | None:
+		"""
+		Pick the window the overlays attach to: the foreground game window, or the last
+		one that was in the foreground while another application is focused.
+		"""
+		if windll is not None:
+			foreground = user32.GetForegroundWindow()
+			if foreground in self.windows:
+				self._focused_hwnd = foreground
+		if self._focused_hwnd not in self.windows:
+			self._focused_hwnd = next(iter(self.windows), None)
+		return self.windows.get(self._focused_hwnd) if self._focused_hwnd is not None else None
@@ -0,0 +1,373 @@
+import time
+import zlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import numpy as np
+from capture import CaptureBackend, Frame, get_points_rect
+
+TOLERANCE = 5
+DETECTION_STRATEGIES = ("inline", "pool", "per_call")
+
+class TabPixelInfo:
+	__slots__ = ('x', 'y', 'color', 'left_side', 'top_side')
+	def __init__(self, x: int, y: int, color: tuple[int, int, int], left_side: bool, top_side: bool):
+		self.x = x
+		self.y = y
+		self.color = color
+		self.left_side = left_side
+		self.top_side = top_side
+
+PIXEL_MAP = {
+	"admin_panel": [
+		TabPixelInfo(940, 360, (85, 85, 85), True, True),
+		TabPixelInfo(940, 385, (85, 85, 85), True, True),
+	],
+	"console_tab": [
+		TabPixelInfo(12, 12, (255, 255, 255), True, True),
+		TabPixelInfo(12, 60, (255, 255, 255), True, True),
+		TabPixelInfo(20, 370, (68, 68, 68), True, True),
+		TabPixelInfo(70, 370, (68, 68, 68), True, True),
+	],
+	"reports_tab": [
+		TabPixelInfo(250, 370, (68, 68, 68), True, True),
+		TabPixelInfo(305, 336, (68, 68, 68), True, True),
+	],
+	"teleport_tab": [
+		TabPixelInfo(340, 370, (68, 68, 68), True, True),
+		TabPixelInfo(420, 370, (68, 68, 68), True, True),
+	],
+}
+
+class ProbeTable:
+	"""
+	PIXEL_MAP compiled into flat arrays, one row per probe.
+	Attributes:
+	- tab_names (list[str]): Tab names, indexed by `tab_index`.
+	- offsets_x, offsets_y (np.ndarray): Probe offsets from the chosen window edge.
+	- left_side, top_side (np.ndarray): Whether the offset is taken from the left/top edge.
+	- colors (np.ndarray): Target RGB colors, shape (probes, 3).
+	- tab_index (np.ndarray): Index into `tab_names` of the tab each probe belongs to.
+	- tab_groups (list[np.ndarray]): Probe indices of every tab.
+	"""
+
+	def __init__(self, pixel_map: dict[str, list[TabPixelInfo]]):
+		self.tab_names = list(pixel_map)
+		probes = [
+			(index, info)
+			for index, pixel_info in enumerate(pixel_map.values())
+			for info in pixel_info
+		]
+		self.offsets_x = np.array([info.x for _, info in probes], dtype=np.int32)
+		self.offsets_y = np.array([info.y for _, info in probes], dtype=np.int32)
+		self.left_side = np.array([info.left_side for _, info in probes], dtype=bool)
+		self.top_side = np.array([info.top_side for _, info in probes], dtype=bool)
+		self.colors = np.array([info.color for _, info in probes], dtype=np.int16).reshape(-1, 3)
+		self.tab_index = np.array([index for index, _ in probes], dtype=np.intp)
+		self.tab_groups = [np.flatnonzero(self.tab_index == index) for index in range(len(self.tab_names))]
+
+	def get_positions(self, right: int, bottom: int, left: int, top: int, scale: float = 1.0) -> tuple[np.ndarray, np.ndarray]:
+		offsets_x, offsets_y = self.offsets_x, self.offsets_y
+		if scale != 1.0:
+			# Offsets are in the reference layout, see layout.get_layout_scale
+			offsets_x = np.rint(offsets_x * scale).astype(np.int32)
+			offsets_y = np.rint(offsets_y * scale).astype(np.int32)
+		xs = np.where(self.left_side, left + offsets_x, right - offsets_x)
+		ys = np.where(self.top_side, top + offsets_y, bottom - offsets_y)
+		return xs, ys
+
+	def evaluate(self, colors: np.ndarray) -> dict[str, bool]:
+		"""
+		Check every probe against its target color in one comparison.
+
+		Args:
+		- colors (np.ndarray): Sampled RGB colors, shape (probes, 3), in table order.
+
+		Returns:
+		- dict[str, bool]: Open state of every tab; a tab is open when all its probes match.
+		"""
+		matches = np.all(np.abs(colors.astype(np.int16) - self.colors) <= TOLERANCE, axis=1)
+		failures = np.bincount(self.tab_index[~matches], minlength=len(self.tab_names))
+		return {tab_name: not failures[index] for index, tab_name in enumerate(self.tab_names)}
+
+	def closed_state(self) -> dict[str, bool]:
+		return dict.fromkeys(self.tab_names, False)
+
+
+PROBE_TABLE = ProbeTable(PIXEL_MAP)
+
+
+class DetectionScheduler:
+	"""
+	Decides where the pixel reads of a detection tick run.
+
+	Strategies:
+	- inline: one read_pixels call on the calling thread.
+	- pool: a long-lived thread pool reads each tab's probes concurrently.
+	- per_call: a fresh thread pool every tick (the old behaviour, kept for benchmarks).
+
+	Batched backends already read every probe in one capture, so they always run inline.
+	"""
+
+	def __init__(self, strategy: str = "inline"):
+		self.strategy = strategy if strategy in DETECTION_STRATEGIES else "inline"
+		self._executor = (
+			ThreadPoolExecutor(thread_name_prefix="tab-detection") if self.strategy == "pool" else None
+		)
+
+	def read_pixels(self, capture_backend: CaptureBackend, xs: np.ndarray, ys: np.ndarray, probe_table: ProbeTable, rect: tuple[int, int, int, int] | None = None) -> np.ndarray:
+		if self.strategy == "inline" or capture_backend.batched:
+			return capture_backend.read_pixels(xs, ys, rect)
+		if self._executor is not None:
+			return self._read_concurrently(self._executor, capture_backend, xs, ys, probe_table)
+		with ThreadPoolExecutor() as executor:
+			return self._read_concurrently(executor, capture_backend, xs, ys, probe_table)
+
+	@staticmethod
+	def _read_concurrently(executor: Executor, capture_backend: CaptureBackend, xs: np.ndarray, ys: np.ndarray, probe_table: ProbeTable) -> np.ndarray:
+		futures = [
+			(group, executor.submit(capture_backend.read_pixels, xs[group], ys[group]))
+			for group in probe_table.tab_groups
+		]
+		colors = np.empty((len(xs), 3), dtype=np.uint8)
+		for group, future in futures:
+			colors[group] = future.result()
+		return colors
+
+	def shutdown(self) -> None:
+		if self._executor is not None:
+			self._executor.shutdown(wait=True)
+			self._executor = None
+
+
+class FrameChangeGate:
+	"""
+	Fingerprints a downsampled patch around every probe to tell whether the console changed.
+
+	Each probe contributes a square grid of pixels, `radius` pixels to each side,
+	sampled every `step` pixels. The probe itself is the grid center, so the probe
+	colors come out of the same read.
+	Attributes:
+	- hits (int): Ticks whose fingerprint matched the previous one.
+	- misses (int): Ticks that needed a full evaluation.
+	"""
+
+	def __init__(self, radius: int = 4, step: int = 2):
+		step = max(step, 1)
+		half = max(radius, 0) // step
+		grid = np.arange(-half, half + 1) * step
+		offsets_y, offsets_x = np.meshgrid(grid, grid, indexing="ij")
+		self.offsets_x = offsets_x.ravel()
+		self.offsets_y = offsets_y.ravel()
+		self.center = len(self.offsets_x) // 2
+		self.hits = 0
+		self.misses = 0
+		self._fingerprint: int | None = None
+
+	@property
+	def hit_rate(self) -> float:
+		total = self.hits + self.misses
+		return self.hits / total if total else 0.0
+
+	def get_positions(self, xs: np.ndarray, ys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+		return (xs[:, None] + self.offsets_x).ravel(), (ys[:, None] + self.offsets_y).ravel()
+
+	def get_probe_colors(self, colors: np.ndarray) -> np.ndarray:
+		return colors.reshape(-1, len(self.offsets_x), 3)[:, self.center]
+
+	def update(self, colors: np.ndarray) -> bool:
+		"""
+		Store the fingerprint of a sampled patch set.
+
+		Returns:
+		- bool: True if it differs from the previous tick.
+		"""
+		fingerprint = zlib.crc32(np.ascontiguousarray(colors).tobytes())
+		if fingerprint == self._fingerprint:
+			self.hits += 1
+			return False
+		self._fingerprint = fingerprint
+		self.misses += 1
+		return True
+
+	def reset(self) -> None:
+		self._fingerprint = None
+
+
+class TabStateDebouncer:
+	"""
+	Per-tab hysteresis between raw detection results and the state the UI follows.
+
+	A tab only switches once the new raw state has been seen in `*_samples`
+	consecutive samples and has persisted for at least `*_dwell` seconds.
+	Opening and closing have separate thresholds, so a panel can still appear on
+	the first matching sample while a single bad read never tears it down.
+	"""
+
+	def __init__(
+		self,
+		tab_names: list[str],
+		open_samples: int = 1,
+		open_dwell: float = 0.0,
+		close_samples: int = 2,
+		close_dwell: float = 0.3,
+	):
+		self.open_samples = max(open_samples, 1)
+		self.open_dwell = open_dwell
+		self.close_samples = max(close_samples, 1)
+		self.close_dwell = close_dwell
+		self.state: dict[str, bool] = dict.fromkeys(tab_names, False)
+		self.last_raw: dict[str, bool] = dict(self.state)
+		# tab name -> (candidate state, consecutive samples, first seen at)
+		self._candidates: dict[str, tuple[bool, int, float]] = {}
+
+	@property
+	def pending(self) -> bool:
+		return bool(self._candidates)
+
+	def update(self, tabs_state: dict[str, bool], now: float | None = None) -> dict[str, bool]:
+		"""
+		Feed one raw sample.
+
+		Args:
+		- tabs_state (dict[str, bool]): Raw open state of every tab.
+		- now (float | None): Sample time; time.monotonic() when None.
+
+		Returns:
+		- dict[str, bool]: Debounced open state of every tab.
+		"""
+		now = time.monotonic() if now is None else now
+		self.last_raw = dict(tabs_state)
+		for tab_name, is_open in tabs_state.items():
+			if is_open == self.state.get(tab_name, False):
+				self._candidates.pop(tab_name, None)
+				continue
+
+			candidate, samples, since = self._candidates.get(tab_name, (is_open, 0, now))
+			if candidate != is_open:
+				samples, since = 0, now
+			samples += 1
+			required_samples, dwell = (
+				(self.open_samples, self.open_dwell) if is_open else (self.close_samples, self.close_dwell)
+			)
+			if samples >= required_samples and now - since >= dwell:
+				self.state[tab_name] = is_open
+				self._candidates.pop(tab_name, None)
+			else:
+				self._candidates[tab_name] = (is_open, samples, since)
+		return dict(self.state)
+
+
+class ProbeGeometry:
+	"""
+	Absolute screen positions of every probe for one window geometry.
+	Attributes:
+	- xs, ys (np.ndarray): Probe positions, in probe table order.
+	- sample_xs, sample_ys (np.ndarray): Positions actually read each tick (probes plus change-gate patches).
+	- capture_rect (tuple[int, int, int, int]): Bounding box of the sampled positions for batched capture.
+	- window_rect (tuple[int, int, int, int]): Left, top, right and bottom of the game's client area.
+	- scale (float): Scale from the reference layout the probe offsets are defined in.
+	"""
+	__slots__ = ('xs', 'ys', 'sample_xs', 'sample_ys', 'capture_rect', 'window_rect', 'scale')
+
+	def __init__(self, probe_table: ProbeTable, left: int, top: int, right: int, bottom: int, change_gate: FrameChangeGate | None = None, scale: float = 1.0):
+		self.window_rect = (left, top, right, bottom)
+		self.scale = scale
+		self.xs, self.ys = probe_table.get_positions(right, bottom, left, top, scale)
+		if change_gate is not None:
+			self.sample_xs, self.sample_ys = change_gate.get_positions(self.xs, self.ys)
+		else:
+			self.sample_xs, self.sample_ys = self.xs, self.ys
+		self.capture_rect = get_points_rect(self.sample_xs, self.sample_ys)
+
+
+class TabDetector:
+	"""
+	Runs tab detection for the game-state hub with a fixed backend, scheduler and probe table.
+
+	Probe positions are compiled into a ProbeGeometry by `set_geometry`, which is
+	called when the game window moves, so the per-tick path does no coordinate math.
+
+	With a change gate and a batched backend, `detect` returns None when the pixels
+	around the probes are identical to the previous tick, meaning nothing has to be
+	re-evaluated. With a debouncer, results are passed through it, and an unchanged
+	frame still counts as a repeated sample while a transition is pending.
+	"""
+
+	def __init__(
+		self,
+		capture_backend: CaptureBackend,
+		scheduler: DetectionScheduler | None = None,
+		probe_table: ProbeTable = PROBE_TABLE,
+		change_gate: FrameChangeGate | None = None,
+		debouncer: TabStateDebouncer | None = None,
+	):
+		self.capture_backend = capture_backend
+		self.scheduler = scheduler if scheduler is not None else DetectionScheduler()
+		self.probe_table = probe_table
+		self.change_gate = change_gate
+		self.debouncer = debouncer
+		self.geometry: ProbeGeometry | None = None
+		self.last_raw: dict[str, bool] = probe_table.closed_state()
+		# Frame the last tick's states were evaluated from; None when it was not one batched capture
+		self.last_frame: Frame | None = None
+
+	@property
+	def pending(self) -> bool:
+		return self.debouncer is not None and self.debouncer.pending
+
+	def set_geometry(self, left: int, top: int, right: int, bottom: int, scale: float = 1.0) -> None:
+		gate = self.change_gate if self.capture_backend.batched else None
+		# Replaced as a whole, so the hub thread never sees a half-updated table
+		self.geometry = ProbeGeometry(self.probe_table, left, top, right, bottom, gate, scale)
+
+	def detect(self, now: float | None = None) -> dict[str, bool] | None:
+		"""
+		Run one detection tick.
+
+		Args:
+		- now (float | None): Tick time for the debouncer; time.monotonic() when None.
+
+		Returns:
+		- dict[str, bool] | None: Open state of every tab, or None when nothing changed.
+		"""
+		tabs_state = self._detect_raw()
+		if tabs_state is not None:
+			self.last_raw = tabs_state
+		if self.debouncer is None:
+			return tabs_state
+		if tabs_state is None:
+			if not self.debouncer.pending:
+				return None
+			tabs_state = self.debouncer.last_raw
+		return self.debouncer.update(tabs_state, now)
+
+	def _detect_raw(self) -> dict[str, bool] | None:
+		self.last_frame = None
+		geometry = self.geometry
+		if geometry is None:
+			return self.probe_table.closed_state()
+
+		if self.change_gate is None or not self.capture_backend.batched:
+			try:
+				colors = self.scheduler.read_pixels(
+					self.capture_backend, geometry.xs, geometry.ys, self.probe_table, geometry.capture_rect
+				)
+			except Exception:
+				return self.probe_table.closed_state()
+			if self.capture_backend.batched:
+				self.last_frame = self.capture_backend.last_frame
+			return self.probe_table.evaluate(colors)
+
+		try:
+			colors = self.capture_backend.read_pixels(geometry.sample_xs, geometry.sample_ys, geometry.capture_rect)
+		except Exception:
+			self.change_gate.reset()
+			return self.probe_table.closed_state()
+		self.last_frame = self.capture_backend.last_frame
+		if not self.change_gate.update(colors):
+			return None
+		return self.probe_table.evaluate(self.change_gate.get_probe_colors(colors))
+
+	def close(self) -> None:
+		self.scheduler.shutdown()
+		self.capture_backend.release()
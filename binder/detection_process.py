@@ -0,0 +1,267 @@
+import multiprocessing
+import threading
+import time
+from multiprocessing import shared_memory
+
+import psutil
+from coordinate_updater import DEFAULT_DPI
+from detection import PROBE_TABLE
+from game_process import STOP_TIMEOUT_MS, GameProcessMonitor
+from game_state import GameStateHub, GameStateSnapshot
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from recorder import decode_tabs_state, encode_tabs_state
+from stall_watchdog import Watchdog
+from state_record import NO_PROCESS, STATE_RECORD, read_record, write_record
+from utils import configuration, setup_logging
+
+
+def write_state(buffer, sequence: int, snapshot: GameStateSnapshot) -> None:
+	"""
+	Write a snapshot into the shared record under a sequence lock.
+
+	Args:
+	- buffer: Shared memory buffer holding the record.
+	- sequence (int): Last sequence written; must be even.
+	- snapshot (GameStateSnapshot): State to publish.
+	"""
+	write_record(buffer, sequence, (
+		NO_PROCESS if snapshot.process_id is None else snapshot.process_id,
+		snapshot.hwnd or 0,
+		snapshot.left, snapshot.top, snapshot.right, snapshot.bottom,
+		snapshot.dpi,
+		encode_tabs_state(PROBE_TABLE.tab_names, snapshot.tabs_state),
+	))
+
+
+def read_state(buffer) -> GameStateSnapshot:
+	"""
+	Read a consistent snapshot from the shared record, retrying while a write is in progress.
+
+	Args:
+	- buffer: Shared memory buffer holding the record.
+
+	Returns:
+	- GameStateSnapshot: The latest published state; its sequence counts writes.
+	"""
+	sequence, (process_id, hwnd, left, top, right, bottom, dpi, mask) = read_record(buffer)
+	return GameStateSnapshot(
+		sequence=sequence,
+		process_id=None if process_id == NO_PROCESS else process_id,
+		hwnd=hwnd or None,
+		left=left,
+		top=top,
+		right=right,
+		bottom=bottom,
+		dpi=dpi or DEFAULT_DPI,
+		tabs_state=decode_tabs_state(PROBE_TABLE.tab_names, mask) if process_id != NO_PROCESS else {},
+	)
+
+
+def run_detection_process(memory_name: str, commands, notifications) -> None:
+	"""
+	Entry point of the detection process: runs the process monitor and the game-state
+	hub, writes every snapshot to shared memory and notifies the GUI process.
+
+	Args:
+	- memory_name (str): Name of the shared memory block holding the state record.
+	- commands (Connection): Receives command names from the GUI process.
+	- notifications (Connection): Gets an empty message after every published snapshot.
+	"""
+	# A spawned process starts without the GUI process's logging setup; it inherits the environment
+	setup_logging()
+	memory = shared_memory.SharedMemory(name=memory_name)
+	sequence = 0
+	process_monitor = GameProcessMonitor()
+	game_state = GameStateHub(process_monitor)
+
+	def publish(snapshot: GameStateSnapshot):
+		nonlocal sequence
+		write_state(memory.buf, sequence, snapshot)
+		sequence += 2
+		try:
+			notifications.send_bytes(b"")
+		except OSError:
+			# The GUI process is gone
+			pass
+
+	game_state.snapshot_changed.connect(publish, Qt.ConnectionType.DirectConnection)
+	watchdog_settings = configuration.settings_config.watchdog
+	watchdog = None
+	if watchdog_settings.enabled:
+		watchdog = Watchdog.from_settings(watchdog_settings)
+		watchdog.watch(process_monitor.heartbeat, process_monitor.restart, watchdog_settings.stall_timeout)
+		watchdog.watch(game_state.heartbeat, game_state.restart, watchdog_settings.stall_timeout)
+		watchdog.start()
+	stopped = threading.Event()
+	threading.Thread(
+		target=read_commands, args=(commands, game_state, stopped), name="detection-commands", daemon=True
+	).start()
+
+	process_monitor.start()
+	game_state.start()
+	stopped.wait()
+	if watchdog is not None:
+		watchdog.stop()
+	game_state.stop()
+	process_monitor.stop()
+	notifications.close()
+	memory.close()
+
+
+def read_commands(commands, game_state: GameStateHub, stopped: threading.Event) -> None:
+	handlers = {
+		"trigger": game_state.poll_scheduler.trigger,
+		"burst": game_state.poll_scheduler.burst,
+		"wake": game_state.poll_scheduler.wake,
+		"start_detection": game_state.start_detection,
+		"stop_detection": game_state.stop_detection,
+	}
+	while True:
+		try:
+			command = commands.recv()
+		except (EOFError, OSError):
+			# The GUI process is gone
+			command = "stop"
+		if command == "stop":
+			stopped.set()
+			return
+		handler = handlers.get(command)
+		if handler is not None:
+			handler()
+
+
+class RemoteScheduler:
+	"""
+	Stands in for GameStateHub.poll_scheduler on the GUI side and forwards its calls.
+	"""
+
+	def __init__(self, game_state: 'RemoteGameStateHub'):
+		self.game_state = game_state
+
+	def trigger(self) -> None:
+		self.game_state.send("trigger")
+
+	def burst(self) -> None:
+		self.game_state.send("burst")
+
+	def wake(self) -> None:
+		self.game_state.send("wake")
+
+
+class RemoteGameStateHub(QThread):
+	"""
+	GUI-side replacement for GameStateHub that runs detection in a child process.
+
+	The child runs the process monitor and the hub (and their watchdog) and writes each
+	snapshot into a shared-memory record. This thread only blocks on the child's
+	notification pipe, reads the record and emits `snapshot_changed`, so detection
+	never competes with the GUI for the interpreter lock. Notifications that pile up
+	are collapsed into one read. If the child dies it is started again after
+	`restart_delay` seconds. With `cpu` set, the child is pinned to that core.
+	"""
+	snapshot_changed = pyqtSignal(object)
+
+	def __init__(self, cpu: int = -1, restart_delay: float = 2.0):
+		super().__init__()
+		self.cpu = cpu
+		self.restart_delay = restart_delay
+		self.snapshot = GameStateSnapshot()
+		self.poll_scheduler = RemoteScheduler(self)
+		self._running = True
+		self._detection_active = False
+		self._commands_lock = threading.Lock()
+		self._commands = None
+		self._notifications = None
+		self._memory: shared_memory.SharedMemory | None = None
+		self._process: multiprocessing.Process | None = None
+
+	def send(self, command: str) -> None:
+		with self._commands_lock:
+			if self._commands is None:
+				return
+			try:
+				self._commands.send(command)
+			except OSError:
+				pass
+
+	def start_detection(self) -> None:
+		self._detection_active = True
+		self.send("start_detection")
+
+	def stop_detection(self) -> None:
+		self._detection_active = False
+		self.send("stop_detection")
+
+	def _spawn(self) -> None:
+		self._memory = shared_memory.SharedMemory(create=True, size=STATE_RECORD.size)
+		self._memory.buf[:STATE_RECORD.size] = bytes(STATE_RECORD.size)
+		command_reader, commands = multiprocessing.Pipe(duplex=False)
+		self._notifications, notification_writer = multiprocessing.Pipe(duplex=False)
+		self._process = multiprocessing.Process(
+			target=run_detection_process,
+			args=(self._memory.name, command_reader, notification_writer),
+			name="binder-detection",
+			daemon=True,
+		)
+		self._process.start()
+		# Only the child keeps these ends, so its exit shows up as EOF here
+		command_reader.close()
+		notification_writer.close()
+		if self.cpu >= 0:
+			try:
+				psutil.Process(self._process.pid).cpu_affinity([self.cpu])
+			except (psutil.Error, ValueError) as e:
+				print(e)
+		with self._commands_lock:
+			self._commands = commands
+		if self._detection_active:
+			self.send("start_detection")
+
+	def _cleanup(self) -> None:
+		with self._commands_lock:
+			if self._commands is not None:
+				self._commands.close()
+				self._commands = None
+		if self._process is not None:
+			self._process.join(STOP_TIMEOUT_MS / 1000)
+			if self._process.is_alive():
+				self._process.terminate()
+			self._process = None
+		if self._notifications is not None:
+			self._notifications.close()
+			self._notifications = None
+		if self._memory is not None:
+			self._memory.close()
+			self._memory.unlink()
+			self._memory = None
+
+	def run(self):
+		self._spawn()
+		while self._running:
+			try:
+				self._notifications.recv_bytes()
+				while self._notifications.poll():
+					self._notifications.recv_bytes()
+			except (EOFError, OSError):
+				if not self._running:
+					break
+				print(f"Detection process exited with code {self._process.exitcode}, restarting")
+				self._cleanup()
+				time.sleep(self.restart_delay)
+				self._spawn()
+				continue
+			snapshot = read_state(self._memory.buf)
+			self.snapshot = snapshot
+			self.snapshot_changed.emit(snapshot)
+		self._cleanup()
+
+	def stop(self):
+		self._running = False
+		self.send("stop")
+		# Read once: the run thread's _cleanup clears it as soon as the child exits
+		process = self._process
+		if process is not None:
+			process.join(STOP_TIMEOUT_MS / 1000)
+			if process.is_alive():
+				process.terminate()
+		self.wait(STOP_TIMEOUT_MS)
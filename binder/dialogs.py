@@ -1,19 +1,21 @@
-import time
 import webbrowser
+from functools import partial
 
 import binder_utils
-import keyboard
-import pyperclip
-from coordinate_updater import CoordinateUpdater
+from game_state import GameStateHub, GameStateSnapshot
+from input_executor import input_executor
+from input_pipeline import paste_text
+from layout import ScreenLayout
+from macros import macro_engine
 from PyQt6.QtCore import QObject, QSize, Qt, QThread, pyqtSignal
 from PyQt6.QtWidgets import QHBoxLayout, QScrollArea, QVBoxLayout, QWidget
 from pyqttoast import ToastPreset
-from utils import (ADDITIONAL_BUTTONS, DraggableWidget, Mouse, configuration,
+from readiness import console_input_probe
+from utils import (ADDITIONAL_BUTTONS, DraggableWidget, configuration,
                    create_button, create_header_layout, create_label,
                    create_line, get_commits_history, get_reports_count,
                    get_reports_info, show_notification)
 
-mouse = Mouse()
 
 class UpdateHistoryWorker(QObject):
 	history_updated = pyqtSignal(list)
@@ -31,11 +33,13 @@ class UpdateHistoryWorker(QObject):
 
 
 class GTAModal(QWidget):
-	def __init__(self, coordinate_updater: CoordinateUpdater, command_name: str, time=None, reason=None):
+	def __init__(self, game_state: GameStateHub, command_name: str, time=None, reason=None):
 		super().__init__()
-		self.coordinate_updater = coordinate_updater
+		self.game_state = game_state
 		self.command_name = command_name
-		self.modal_type = ADDITIONAL_BUTTONS[command_name]
+		# Buttons outside ADDITIONAL_BUTTONS are macros from macros.json
+		self.modal_type = ADDITIONAL_BUTTONS.get(command_name, "macro")
+		self.macro = macro_engine.get(command_name) if self.modal_type in {"car_sync", "macro"} else None
 		self.time = time
 		self.reason = reason
 		self.setup_coordinates()
@@ -43,9 +47,8 @@ class GTAModal(QWidget):
 		self.setup_ui()
 
 	def setup_coordinates(self):
-		self.coordinate_updater.coordinates_updated.connect(self.update_window_size)
-		self.left = self.coordinate_updater.left
-		self.top = self.coordinate_updater.top
+		self.game_state.snapshot_changed.connect(self.update_window_size)
+		self.screen_layout = ScreenLayout.from_snapshot(self.game_state.snapshot)
 
 	def setup_callbacks(self):
 		self.callbacks = {
@@ -54,12 +57,13 @@ class GTAModal(QWidget):
 			"uncuff": self.middle_command,
 			"mute_report": self.middle_command,
 			"force_rename": self.middle_command,
-			"car_sync": self.car_sync,
+			"car_sync": self.macro_command,
+			"macro": self.macro_command,
 		}
 
-	def update_window_size(self, left, top, *_):
-		self.left = left
-		self.top = top
+	def update_window_size(self, snapshot: GameStateSnapshot):
+		if not self.screen_layout.matches(snapshot):
+			self.screen_layout = ScreenLayout.from_snapshot(snapshot)
 
 	def setup_ui(self):
 		self.setWindowFlags(Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
@@ -104,6 +108,16 @@ class GTAModal(QWidget):
 			middle_layout.addWidget(reason_label)
 			middle_layout.addWidget(self.reason_edit)
 
+		elif self.macro is not None:
+			if "time" in self.macro.fields:
+				time_label, self.time_edit = create_label("Время:"), create_line(text=self.time)
+				middle_layout.addWidget(time_label)
+				middle_layout.addWidget(self.time_edit)
+			if "reason" in self.macro.fields:
+				reason_label, self.reason_edit = create_label("Причина:"), create_line(text=self.reason)
+				middle_layout.addWidget(reason_label)
+				middle_layout.addWidget(self.reason_edit)
+
 		middle_widget = QWidget()
 		middle_widget.setProperty("class", "modal-middle")
 		middle_widget.setLayout(middle_layout)
@@ -135,20 +149,25 @@ class GTAModal(QWidget):
 	def middle_command(self):
 		self.execute_command(["gid", "reason"], "commands")
 
-	def car_sync(self):
-		user_gid = configuration.settings_config.user_gid
-		car_gid = self.gid_edit.text()
-		actions = [
-			f"dimension {user_gid} 1",
-			f"tpcar {car_gid}",
-			f"veh_repair {car_gid}",
-			f"dimension {user_gid} 0",
-			f"tpcar {car_gid}"
-		]
-		for action in actions:
-			self.paste_to_console(text=action, paste_type="commands")
-			time.sleep(1)
+	def macro_command(self):
+		if self.macro is None:
+			show_notification(parent=self, preset=ToastPreset.ERROR_DARK, text=f"Макрос {self.command_name} не найден в macros.json!")
+			return
+		settings = configuration.settings_config
+		values = {
+			"user_gid": settings.user_gid,
+			"gid": self.gid_edit.text(),
+			"time": self.time_edit.text() if "time" in self.macro.fields else "",
+			"reason": self.reason_edit.text() if "reason" in self.macro.fields else "",
+		}
+		run = self.macro.build(
+			values,
+			paste=partial(self.console_paste, paste_type="commands"),
+			layout=self.screen_layout,
+			input_settings=settings.input,
+		)
 		self.close()
+		input_executor.submit(self.command_name, run, on_finished=self.game_state.poll_scheduler.burst, report=run.report)
 
 	def execute_command(self, fields, paste_type):
 		try:
@@ -159,21 +178,29 @@ class GTAModal(QWidget):
 			if "reason" in fields:
 				args.append(self.reason_edit.text())
 			command = f"{self.command_name} {' '.join(map(str, args))}"
-			self.paste_to_console(text=command, paste_type=paste_type)
 			self.close()
+			self.paste_to_console(text=command, paste_type=paste_type)
 		except (ValueError, TypeError):
 			show_notification(parent=self, preset=ToastPreset.ERROR_DARK, text="ID должен быть целочисленным значением!")
 
 	def paste_to_console(self, text, paste_type=None):
-		mouse.click((self.left + 55, self.top + 375))
-		time.sleep(0.2)
-		mouse.click((self.left + 500, self.top + 335))
-		keyboard.send("ctrl+a, backspace")
-		pyperclip.copy(text)
-		keyboard.send('ctrl+v')
-		time.sleep(0.1)
-		if paste_type and getattr(configuration.settings_config.auto_send, paste_type, False):
-			keyboard.send("enter")
+		input_executor.submit(self.command_name, self.console_paste(text, paste_type), on_finished=self.game_state.poll_scheduler.burst)
+
+	def console_paste(self, text, paste_type=None) -> partial:
+		"""
+		Build a console paste for the input executor, with the current layout and settings baked in.
+		"""
+		return partial(
+			paste_text,
+			text,
+			field=self.screen_layout.console_input,
+			tab=self.screen_layout.console_tab,
+			submit=bool(paste_type and getattr(configuration.settings_config.auto_send, paste_type, False)),
+			settle=configuration.settings_config.input.tab_settle,
+			ready=console_input_probe(self.screen_layout),
+			ready_timeout=configuration.settings_config.input.ready_timeout,
+			delivery=getattr(configuration.settings_config.text_delivery, paste_type or "commands", "clipboard"),
+		)
 
 
 class AboutWindow(DraggableWidget):
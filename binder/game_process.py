@@ -0,0 +1,272 @@
+import logging
+import threading
+import time
+
+import binder_utils
+import psutil
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from stall_watchdog import Heartbeat
+from win_events import EVENT_SYSTEM_FOREGROUND, WinEventListener
+
+try:
+	from ctypes import windll
+except ImportError:  # Not Windows: exit is detected with the psutil liveness check
+	windll = None
+
+SYNCHRONIZE = 0x00100000
+WAIT_OBJECT_0 = 0x00000000
+WAIT_TIMEOUT = 0x00000102
+
+GAME_EXECUTABLE = "GTA5.exe"
+STOP_TIMEOUT_MS = 3000
+
+logger = logging.getLogger(__name__)
+
+# psutil only defines the priority classes on Windows
+ACTIVE_PRIORITY = getattr(psutil, "ABOVE_NORMAL_PRIORITY_CLASS", 0)
+IDLE_PRIORITY = getattr(psutil, "NORMAL_PRIORITY_CLASS", 0)
+
+
+class IdleStats:
+	"""
+	Measures what the app costs while the game is not running: how long it has been
+	idle, the CPU time it used meanwhile and how often its threads woke up.
+	"""
+
+	def __init__(self):
+		self.wakeups = 0
+		self._lock = threading.Lock()
+		self._process = psutil.Process()
+		self._idle_seconds = 0.0
+		self._idle_cpu_seconds = 0.0
+		self._idle_since: float | None = None
+		self._cpu_at_idle = 0.0
+
+	@property
+	def idle(self) -> bool:
+		return self._idle_since is not None
+
+	@property
+	def idle_seconds(self) -> float:
+		with self._lock:
+			if self._idle_since is None:
+				return self._idle_seconds
+			return self._idle_seconds + time.monotonic() - self._idle_since
+
+	@property
+	def idle_cpu_seconds(self) -> float:
+		with self._lock:
+			if self._idle_since is None:
+				return self._idle_cpu_seconds
+			return self._idle_cpu_seconds + self._cpu_time() - self._cpu_at_idle
+
+	def _cpu_time(self) -> float:
+		cpu_times = self._process.cpu_times()
+		return cpu_times.user + cpu_times.system
+
+	def enter_idle(self) -> None:
+		with self._lock:
+			if self._idle_since is None:
+				self._idle_since = time.monotonic()
+				self._cpu_at_idle = self._cpu_time()
+
+	def leave_idle(self) -> None:
+		with self._lock:
+			if self._idle_since is not None:
+				self._idle_seconds += time.monotonic() - self._idle_since
+				self._idle_cpu_seconds += self._cpu_time() - self._cpu_at_idle
+				self._idle_since = None
+
+	def record_wakeup(self) -> None:
+		with self._lock:
+			self.wakeups += 1
+
+	def summary(self) -> str:
+		return f"Idle: {self.idle_seconds:.0f} s, {self.idle_cpu_seconds:.2f} s CPU, {self.wakeups} wakeups"
+
+
+def set_process_priority(priority: int) -> None:
+	if not priority:
+		return
+	try:
+		psutil.Process().nice(priority)
+	except psutil.Error as e:
+		print(e)
+
+
+class GameProcessMonitor(QThread):
+	"""
+	Resolves the game process once and keeps it cached for every consumer.
+
+	While the game is not running the thread is parked: it looks the executable up when
+	the foreground window changes (a starting game takes the foreground), at most once
+	every `lookup_interval` seconds, and otherwise only every `idle_lookup_interval`
+	seconds. The app drops to normal priority meanwhile, and `idle_stats` counts the
+	wakeups and CPU time spent.
+
+	Once found, the thread waits on the process handle (or, when it cannot be opened,
+	checks liveness every `liveness_interval` seconds) until the game exits, and the app
+	returns to above-normal priority. `process_started` and `process_exited` are
+	emitted on each transition; when one of several running clients exits, the next
+	one is reported through `process_started` alone.
+	"""
+	process_started = pyqtSignal(object)
+	process_exited = pyqtSignal()
+
+	def __init__(
+		self,
+		executable: str = GAME_EXECUTABLE,
+		lookup_interval: float = 1.0,
+		idle_lookup_interval: float = 30.0,
+		liveness_interval: float = 1.0,
+		manage_priority: bool = True,
+	):
+		super().__init__()
+		self.executable = executable
+		self.lookup_interval = lookup_interval
+		self.idle_lookup_interval = idle_lookup_interval
+		self.liveness_interval = liveness_interval
+		self.manage_priority = manage_priority
+		self.process = None
+		self.process_handle = None
+		self.idle_stats = IdleStats()
+		self._running = True
+		self._stop_event = threading.Event()
+		self._wake_event = threading.Event()
+		self._present_event = threading.Event()
+		self._start_events: WinEventListener | None = None
+		self._generation = 0
+		# Loop thread started by restart(); the QThread itself runs the first generation
+		self._restarted_thread: threading.Thread | None = None
+		self.heartbeat = Heartbeat("game-process")
+
+	@property
+	def process_id(self) -> int | None:
+		process = self.process
+		return process[0] if process is not None else None
+
+	def wait_for_process(self, timeout: float | None = None):
+		"""
+		Block until the game is running or the timeout expires.
+
+		Args:
+		- timeout (float | None): Longest wait in seconds; forever when None.
+
+		Returns:
+		- The cached process, or None if the game is still not running.
+		"""
+		self._present_event.wait(timeout)
+		return self.process
+
+	def wake(self):
+		self._wake_event.set()
+
+	def run(self):
+		self._loop(self._generation)
+
+	def restart(self):
+		"""
+		Abandon a loop stalled in a process lookup and continue on a fresh thread.
+		If the stalled thread ever returns, it sees that its generation is over and exits.
+		"""
+		self._generation += 1
+		self._restarted_thread = threading.Thread(target=self._loop, args=(self._generation,), name="game-process", daemon=True)
+		self._restarted_thread.start()
+
+	def _lookup(self, generation: int):
+		with self.heartbeat.tick():
+			try:
+				process = binder_utils.get_process(self.executable)
+			except Exception as e:
+				print(e)
+				process = None
+		# A stalled lookup that returns after a restart must not act on its result
+		return process if generation == self._generation else None
+
+	def _loop(self, generation: int):
+		self._enter_idle()
+		while self._running and generation == self._generation:
+			process = self._lookup(generation)
+			if process is None:
+				if generation == self._generation:
+					self._wait_for_start()
+				continue
+
+			self._leave_idle()
+			self._present_event.set()
+			# With several clients open, another one takes over without an exit in between
+			while process is not None and self._running:
+				self.process = process
+				self.process_started.emit(process)
+				self._wait_for_exit(process[0])
+				exited_id = process[0]
+				process = self._lookup(generation) if self._running else None
+				if process is not None and process[0] == exited_id:
+					# Still listed while it finishes exiting
+					process = None
+			if not self._running or generation != self._generation:
+				break
+			self._present_event.clear()
+			self.process = None
+			self.process_exited.emit()
+			self._enter_idle()
+		if generation == self._generation:
+			self._leave_idle()
+
+	def _enter_idle(self) -> None:
+		if self._start_events is not None:
+			return
+		self.idle_stats.enter_idle()
+		if self.manage_priority:
+			set_process_priority(IDLE_PRIORITY)
+		self._start_events = WinEventListener(win_events=(EVENT_SYSTEM_FOREGROUND,))
+		self._start_events.foreground_changed.connect(self.wake, Qt.ConnectionType.DirectConnection)
+		self._start_events.start()
+
+	def _leave_idle(self) -> None:
+		if self._start_events is not None:
+			self._start_events.stop()
+			self._start_events = None
+		if self.manage_priority:
+			set_process_priority(ACTIVE_PRIORITY)
+		self.idle_stats.leave_idle()
+		logger.debug(self.idle_stats.summary())
+
+	def _wait_for_start(self) -> None:
+		self._wake_event.wait(self.idle_lookup_interval)
+		self._wake_event.clear()
+		self.idle_stats.record_wakeup()
+		# A burst of foreground changes costs one lookup
+		self._stop_event.wait(self.lookup_interval)
+
+	def _wait_for_exit(self, process_id: int) -> None:
+		if windll is not None:
+			self.process_handle = windll.kernel32.OpenProcess(SYNCHRONIZE, False, process_id)
+		if self.process_handle:
+			try:
+				# Wait in slices so stop() is not held up by a running game
+				while self._running:
+					if windll.kernel32.WaitForSingleObject(self.process_handle, 250) != WAIT_TIMEOUT:
+						return
+			finally:
+				windll.kernel32.CloseHandle(self.process_handle)
+				self.process_handle = None
+
+		try:
+			process = psutil.Process(process_id)
+		except psutil.NoSuchProcess:
+			return
+		while self._running and process.is_running():
+			self._stop_event.wait(self.liveness_interval)
+
+	def stop(self):
+		self._running = False
+		self._stop_event.set()
+		self._wake_event.set()
+		# Release anyone parked in wait_for_process()
+		self._present_event.set()
+		# Bounded, so a thread stuck in a native call cannot block shutdown
+		self.wait(STOP_TIMEOUT_MS)
+		if self._restarted_thread is not None:
+			self._restarted_thread.join(STOP_TIMEOUT_MS / 1000)
+		logger.debug(self.idle_stats.summary())
@@ -0,0 +1,338 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+
+from capture import CaptureBackend, create_capture_backend
+from coordinate_updater import (DEFAULT_DPI, GameWindow, GameWindowTracker,
+								WindowEventSource, WinEventWindowSource)
+from detection import (PROBE_TABLE, DetectionScheduler, FrameChangeGate,
+					   TabDetector, TabStateDebouncer)
+from game_process import STOP_TIMEOUT_MS, GameProcessMonitor
+from layout import get_layout_scale
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from recorder import DetectionRecorder
+from scheduler import AdaptivePollScheduler
+from stall_watchdog import Heartbeat
+from utils import configuration
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class GameStateSnapshot:
+	"""
+	Process status, window geometry and tab states as seen by one hub tick.
+	Snapshots are never modified; the hub publishes a new one on every change.
+	The geometry is the client area of the focused game window (`hwnd`).
+	"""
+	sequence: int = 0
+	process_id: int | None = None
+	hwnd: int | None = None
+	left: int = 0
+	top: int = 0
+	right: int = 0
+	bottom: int = 0
+	dpi: int = DEFAULT_DPI
+	tabs_state: dict[str, bool] = field(default_factory=dict)
+
+	@property
+	def scale(self) -> float:
+		return self.dpi / DEFAULT_DPI
+
+	@property
+	def running(self) -> bool:
+		return self.process_id is not None
+
+	@property
+	def window_rect(self) -> tuple[int, int, int, int]:
+		return self.left, self.top, self.right, self.bottom
+
+	@property
+	def window_width(self) -> int:
+		return self.right - self.left
+
+	@property
+	def window_height(self) -> int:
+		return self.bottom - self.top
+
+
+class GameStateHub(QThread):
+	"""
+	Owns the game process status, window geometry and console tab states and updates
+	them all from one thread.
+
+	Every game window is tracked, and the snapshot follows the focused one. A window's
+	geometry is re-read when a location-change or focus event arrives for it (a burst
+	of them is coalesced into one read per frame), and all windows are rescanned at
+	least every `fallback_interval` seconds.
+	Tab detection runs only between `start_detection` and `stop_detection`, paced by
+	`poll_scheduler`, and always against the geometry of the same tick. While the game
+	is minimized or another application is in the foreground, detection is suspended
+	and the last tab states are kept.
+
+	Every change is published through `snapshot_changed` as one GameStateSnapshot, so
+	consumers never combine coordinates and tab states from different moments.
+	"""
+	snapshot_changed = pyqtSignal(object)
+
+	def __init__(
+		self,
+		process_monitor: GameProcessMonitor,
+		event_source: WindowEventSource | None = None,
+		fallback_interval: float = 1.5,
+		coalesce_interval: float = 1 / 60,
+	):
+		super().__init__()
+		settings_config = configuration.settings_config
+		self.process_monitor = process_monitor
+		self.fallback_interval = fallback_interval
+		self.coalesce_interval = coalesce_interval
+		self.snapshot = GameStateSnapshot()
+		self.tab_detector: TabDetector | None = None
+		self.recorder: DetectionRecorder | None = None
+		self._detection_lock = threading.Lock()
+		self._geometry_dirty = threading.Event()
+		self._dirty_lock = threading.Lock()
+		self._dirty_windows: set[int] = set()
+		self.window_tracker = GameWindowTracker(process_monitor.executable)
+		self._geometry_checked_at = 0.0
+		self._generation = 0
+		# Loop thread started by restart(); the QThread itself runs the first generation
+		self._restarted_thread: threading.Thread | None = None
+		self.heartbeat = Heartbeat("game-state")
+		self.suspend_in_background = settings_config.detection.suspend_in_background
+		self.detection_suspended = False
+		self.suspended_ticks = 0
+
+		self.poll_scheduler = AdaptivePollScheduler.from_settings(settings_config.polling)
+		self.console_open_interval = settings_config.polling.console_open_interval
+		if settings_config.detection.event_triggers:
+			# Events request the checks that matter, polling is only a safety net
+			self.poll_scheduler.max_interval = max(settings_config.polling.event_max_interval, self.poll_scheduler.min_interval)
+
+		self.event_source = event_source if event_source is not None else WinEventWindowSource()
+		self.event_source.location_changed.connect(self.request_geometry_update, Qt.ConnectionType.DirectConnection)
+		self.process_monitor.process_started.connect(self.poll_scheduler.trigger, Qt.ConnectionType.DirectConnection)
+		self.process_monitor.process_exited.connect(self.poll_scheduler.wake, Qt.ConnectionType.DirectConnection)
+
+	def request_geometry_update(self, hwnd):
+		with self._dirty_lock:
+			self._dirty_windows.add(hwnd)
+			self._geometry_dirty.set()
+		self.poll_scheduler.wake()
+
+	def start_detection(self, capture_backend: CaptureBackend | None = None) -> TabDetector:
+		"""
+		Start tab detection with a detector built from the detection settings.
+
+		Args:
+		- capture_backend (CaptureBackend | None): Backend to read pixels with; the configured one when None.
+
+		Returns:
+		- TabDetector: The detector now run by the hub.
+		"""
+		detection_settings = configuration.settings_config.detection
+		tab_detector = TabDetector(
+			capture_backend=capture_backend or create_capture_backend(detection_settings.capture_backend),
+			scheduler=DetectionScheduler(detection_settings.scheduling),
+			change_gate=(
+				FrameChangeGate(radius=detection_settings.gate_radius, step=detection_settings.gate_step)
+				if detection_settings.change_gate else None
+			),
+			debouncer=TabStateDebouncer(
+				PROBE_TABLE.tab_names,
+				open_samples=detection_settings.open_samples,
+				open_dwell=detection_settings.open_dwell,
+				close_samples=detection_settings.close_samples,
+				close_dwell=detection_settings.close_dwell,
+			),
+		)
+		recorder = (
+			DetectionRecorder.create(configuration.data_path / "recordings", PROBE_TABLE.tab_names)
+			if detection_settings.recording else None
+		)
+		with self._detection_lock:
+			self._close_detection()
+			snapshot = self.snapshot
+			if snapshot.running:
+				tab_detector.set_geometry(*snapshot.window_rect, get_layout_scale(snapshot.window_height, snapshot.scale))
+			self.tab_detector = tab_detector
+			self.recorder = recorder
+		self.poll_scheduler.trigger()
+		return tab_detector
+
+	def stop_detection(self):
+		with self._detection_lock:
+			self._close_detection()
+
+	def _close_detection(self):
+		if self.tab_detector is None:
+			return
+		if (change_gate := self.tab_detector.change_gate) is not None:
+			logger.debug(
+				"Change gate: %d hits, %d misses (%.0f%%)", change_gate.hits, change_gate.misses, change_gate.hit_rate * 100
+			)
+		self.tab_detector.close()
+		if self.recorder is not None:
+			self.recorder.close()
+		self.tab_detector = None
+		self.recorder = None
+
+	def run(self):
+		self._loop(self._generation)
+
+	def restart(self):
+		"""
+		Abandon a stalled loop and continue on a fresh thread.
+
+		The stalled thread may still hold the detection lock and the detector, so both
+		are replaced rather than closed. If the thread ever returns, it keeps using the
+		detector it had bound for its tick, sees that its generation is over before
+		recording or publishing anything, and exits.
+		"""
+		self._generation += 1
+		self._detection_lock = threading.Lock()
+		if self.tab_detector is not None:
+			self.tab_detector = None
+			self.recorder = None
+			self.start_detection()
+		self._restarted_thread = threading.Thread(target=self._loop, args=(self._generation,), name="game-state", daemon=True)
+		self._restarted_thread.start()
+
+	def _loop(self, generation: int):
+		while self.poll_scheduler.running and generation == self._generation:
+			with self.heartbeat.tick():
+				try:
+					self.tick(generation)
+				except Exception as e:
+					print(e)
+
+			if not self.snapshot.running:
+				# Parked until the process monitor reports a start
+				self.poll_scheduler.park()
+				self.process_monitor.idle_stats.record_wakeup()
+			elif self.tab_detector is None or self.detection_suspended:
+				self.poll_scheduler.wait(self.fallback_interval)
+			elif any(self.snapshot.tabs_state.values()):
+				# Switching tabs inside an open console raises no event; the change gate keeps these ticks cheap
+				self.poll_scheduler.wait(min(self.poll_scheduler.interval, self.console_open_interval))
+			else:
+				self.poll_scheduler.wait()
+
+		if generation == self._generation:
+			self.stop_detection()
+			self.event_source.stop()
+
+	def tick(self, generation: int | None = None):
+		"""
+		Run one update; a tick whose `generation` was abandoned by `restart` never publishes.
+		"""
+		generation = self._generation if generation is None else generation
+		snapshot = self.snapshot
+		process = self.process_monitor.process
+		if process is None:
+			self.event_source.stop()
+			if snapshot.running and generation == self._generation:
+				tabs_state = self.tab_detector.probe_table.closed_state() if self.tab_detector else {}
+				self._publish(None, None, tabs_state)
+			return
+
+		process_id = process[0]
+		now = time.monotonic()
+		if process_id != snapshot.process_id:
+			self.window_tracker.forget_processes()
+		if process_id != snapshot.process_id or now - self._geometry_checked_at >= self.fallback_interval:
+			self._take_dirty_windows()
+			self.window_tracker.refresh()
+			self._geometry_checked_at = now
+		elif self._geometry_dirty.is_set():
+			# Coalesce a burst of move events into one read per frame
+			time.sleep(self.coalesce_interval)
+			self.window_tracker.refresh(self._take_dirty_windows())
+		self.event_source.track(self.window_tracker.process_ids or {process_id})
+
+		# A minimized or hidden client keeps the last known geometry
+		window = self.window_tracker.focused()
+		window_rect = window.window_rect if window is not None else snapshot.window_rect
+		window_changed = window is not None and (window.hwnd, window.window_rect, window.dpi) != (snapshot.hwnd, snapshot.window_rect, snapshot.dpi)
+		# Pixels of a background, minimized or covered game belong to other windows
+		active = window is not None and (not self.suspend_in_background or self.window_tracker.is_active(window))
+
+		tabs_state = snapshot.tabs_state
+		pending = False
+		# Bound once, so a restart swapping them mid-tick cannot mix two detectors
+		detection_lock = self._detection_lock
+		with detection_lock:
+			if generation != self._generation:
+				return
+			tab_detector, recorder = self.tab_detector, self.recorder
+			if tab_detector is not None:
+				if window_changed or tab_detector.geometry is None:
+					dpi = window.dpi if window is not None else snapshot.dpi
+					layout_scale = get_layout_scale(window_rect[3] - window_rect[1], dpi / DEFAULT_DPI)
+					tab_detector.set_geometry(*window_rect, layout_scale)
+				if active:
+					if self.detection_suspended:
+						# Back in the foreground: this tick re-checks, the trigger confirms shortly after
+						self.poll_scheduler.trigger()
+					detected = tab_detector.detect()
+					if generation != self._generation:
+						return
+					if recorder is not None:
+						self._record_tick(tab_detector, recorder)
+					# None means the console region is unchanged since the last tick
+					if detected is not None:
+						tabs_state = detected
+					pending = tab_detector.pending
+				else:
+					self.suspended_ticks += 1
+			self.detection_suspended = not active
+
+		tabs_changed = tabs_state != snapshot.tabs_state
+		# Keep the fast cadence while a debounced transition is waiting for confirmation
+		self.poll_scheduler.record(changed=tabs_changed or pending)
+		if generation != self._generation:
+			return
+		if process_id != snapshot.process_id or window_changed or tabs_changed:
+			self._publish(process_id, window if window_changed else None, tabs_state)
+
+	def _take_dirty_windows(self) -> set[int]:
+		with self._dirty_lock:
+			self._geometry_dirty.clear()
+			dirty_windows, self._dirty_windows = self._dirty_windows, set()
+		return dirty_windows
+
+	def _record_tick(self, tab_detector: TabDetector, recorder: DetectionRecorder):
+		# The frame detect() evaluated, so replay sees exactly what produced `last_raw`
+		geometry, frame = tab_detector.geometry, tab_detector.last_frame
+		if geometry is None or frame is None:
+			return
+		recorder.record(geometry, frame, tab_detector.last_raw)
+
+	def _publish(self, process_id: int | None, window: GameWindow | None, tabs_state: dict[str, bool]):
+		geometry = {}
+		if window is not None:
+			geometry = dict(
+				hwnd=window.hwnd,
+				left=window.left,
+				top=window.top,
+				right=window.right,
+				bottom=window.bottom,
+				dpi=window.dpi,
+			)
+		self.snapshot = replace(
+			self.snapshot,
+			sequence=self.snapshot.sequence + 1,
+			process_id=process_id,
+			tabs_state=dict(tabs_state),
+			**geometry,
+		)
+		self.snapshot_changed.emit(self.snapshot)
+
+	def stop(self):
+		self.poll_scheduler.stop()
+		# Bounded, so a thread stuck in a native call cannot block shutdown
+		self.wait(STOP_TIMEOUT_MS)
+		if self._restarted_thread is not None:
+			self._restarted_thread.join(STOP_TIMEOUT_MS / 1000)
@@ -0,0 +1,116 @@
+import itertools
+import logging
+import queue
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from game_process import STOP_TIMEOUT_MS
+from PyQt6.QtCore import QThread, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InputAction:
+	"""
+	One unit of automation run by the InputExecutor.
+
+	`run` executes on the executor thread, so it must only use values captured when
+	the action was built, never widgets. `on_finished` runs back on the GUI thread,
+	and `report`, if set, describes the finished run in the log.
+	"""
+	name: str
+	run: Callable[[], object]
+	on_finished: Callable[[], None] | None = None
+	report: Callable[[], str] | None = None
+	action_id: int = field(default_factory=itertools.count(1).__next__)
+	duration: float = 0.0
+
+
+class InputExecutor(QThread):
+	"""
+	Runs input actions one at a time on a dedicated thread.
+
+	The GUI only enqueues actions, so waits inside an action never freeze the
+	overlay, and actions queued by rapid clicks run one after another instead of
+	interleaving their key events.
+
+	Signals:
+	- action_finished(InputAction): An action completed; `duration` is set.
+	- action_failed(InputAction, str): An action raised; carries the error message.
+	"""
+	action_finished = pyqtSignal(object)
+	action_failed = pyqtSignal(object, str)
+
+	def __init__(self):
+		super().__init__()
+		self._queue: queue.Queue[InputAction | None] = queue.Queue()
+		# The executor object lives on the GUI thread, so this slot runs there
+		self.action_finished.connect(self._on_action_finished)
+		self.action_failed.connect(self._on_action_failed)
+
+	@property
+	def pending(self) -> int:
+		return self._queue.qsize()
+
+	def submit(
+		self,
+		name: str,
+		run: Callable[[], object],
+		on_finished: Callable[[], None] | None = None,
+		report: Callable[[], str] | None = None,
+	) -> InputAction:
+		"""
+		Queue an action, starting the thread on first use.
+
+		Args:
+		- name (str): Label used in logs.
+		- run (Callable[[], object]): Work done on the executor thread.
+		- on_finished (Callable[[], None] | None): Called on the GUI thread once `run` returns.
+		- report (Callable[[], str] | None): Called on the GUI thread once `run` returns; its text is logged.
+
+		Returns:
+		- InputAction: The queued action.
+		"""
+		action = InputAction(name=name, run=run, on_finished=on_finished, report=report)
+		self._queue.put(action)
+		if not self.isRunning():
+			self.start()
+		return action
+
+	def run(self):
+		while True:
+			action = self._queue.get()
+			if action is None:
+				return
+			start = time.perf_counter()
+			try:
+				action.run()
+			except Exception as e:
+				action.duration = time.perf_counter() - start
+				self.action_failed.emit(action, str(e))
+				continue
+			action.duration = time.perf_counter() - start
+			self.action_finished.emit(action)
+
+	def _on_action_finished(self, action: InputAction) -> None:
+		if action.report is not None:
+			logger.info(action.report())
+		if action.on_finished is None:
+			return
+		try:
+			action.on_finished()
+		except RuntimeError as e:
+			# The widget that queued the action was closed in the meantime
+			print(e)
+
+	def _on_action_failed(self, action: InputAction, error: str) -> None:
+		print(f"Input action {action.name} failed after {action.duration * 1000:.0f} ms: {error}")
+
+	def stop(self):
+		self._queue.put(None)
+		self.wait(STOP_TIMEOUT_MS)
+
+
+input_executor = InputExecutor()
@@ -0,0 +1,316 @@
+from ctypes import POINTER, Structure, Union, byref, c_int, sizeof
+from ctypes import wintypes
+from typing import Callable
+
+import pyperclip
+from PyQt6.QtGui import QGuiApplication
+from readiness import pending_readiness, wait_until
+from utils import TextDeliveryMode
+
+try:
+	from ctypes import windll
+except ImportError:  # Not Windows: batches are built but never sent
+	windll = None
+
+INPUT_MOUSE = 0
+INPUT_KEYBOARD = 1
+
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_LEFTDOWN = 0x0002
+MOUSEEVENTF_LEFTUP = 0x0004
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+MOUSEEVENTF_ABSOLUTE = 0x8000
+KEYEVENTF_KEYUP = 0x0002
+KEYEVENTF_UNICODE = 0x0004
+
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+
+VK_BACK = 0x08
+VK_RETURN = 0x0D
+VK_CONTROL = 0x11
+VK_A = 0x41
+VK_V = 0x56
+
+
+class MOUSEINPUT(Structure):
+	_fields_ = [
+		("dx", wintypes.LONG),
+		("dy", wintypes.LONG),
+		("mouseData", wintypes.DWORD),
+		("dwFlags", wintypes.DWORD),
+		("time", wintypes.DWORD),
+		("dwExtraInfo", wintypes.WPARAM),
+	]
+
+
+class KEYBDINPUT(Structure):
+	_fields_ = [
+		("wVk", wintypes.WORD),
+		("wScan", wintypes.WORD),
+		("dwFlags", wintypes.DWORD),
+		("time", wintypes.DWORD),
+		("dwExtraInfo", wintypes.WPARAM),
+	]
+
+
+class HARDWAREINPUT(Structure):
+	_fields_ = [
+		("uMsg", wintypes.DWORD),
+		("wParamL", wintypes.WORD),
+		("wParamH", wintypes.WORD),
+	]
+
+
+class _INPUTUNION(Union):
+	_fields_ = [("mi", MOUSEINPUT), ("ki", KEYBDINPUT), ("hi", HARDWAREINPUT)]
+
+
+class INPUT(Structure):
+	_anonymous_ = ("u",)
+	_fields_ = [("type", wintypes.DWORD), ("u", _INPUTUNION)]
+
+
+if windll is not None:
+	user32 = windll.user32
+
+	user32.SendInput.restype = wintypes.UINT
+	user32.SendInput.argtypes = [wintypes.UINT, POINTER(INPUT), c_int]
+	user32.GetCursorPos.argtypes = [POINTER(wintypes.POINT)]
+	user32.MapVirtualKeyW.restype = wintypes.UINT
+	user32.MapVirtualKeyW.argtypes = [wintypes.UINT, wintypes.UINT]
+
+
+class ScreenMetrics:
+	"""
+	Virtual-desktop bounds used to normalize absolute mouse coordinates.
+
+	They are read once and kept until `invalidate` is called; `watch_display_changes`
+	does that whenever a screen is added, removed or changes geometry.
+	"""
+
+	def __init__(self):
+		self._bounds: tuple[int, int, int, int] | None = None
+		self._watching = False
+
+	@property
+	def bounds(self) -> tuple[int, int, int, int]:
+		if self._bounds is None:
+			if windll is None:
+				self._bounds = (0, 0, 2, 2)
+			else:
+				self._bounds = (
+					user32.GetSystemMetrics(SM_XVIRTUALSCREEN),
+					user32.GetSystemMetrics(SM_YVIRTUALSCREEN),
+					max(user32.GetSystemMetrics(SM_CXVIRTUALSCREEN), 2),
+					max(user32.GetSystemMetrics(SM_CYVIRTUALSCREEN), 2),
+				)
+		return self._bounds
+
+	def invalidate(self, *args) -> None:
+		self._bounds = None
+
+	def normalize(self, x: int, y: int) -> tuple[int, int]:
+		"""
+		Convert a screen point to SendInput's 0..65535 virtual-desktop coordinates.
+
+		Args:
+		- x (int): Screen X coordinate in physical pixels.
+		- y (int): Screen Y coordinate in physical pixels.
+
+		Returns:
+		- tuple[int, int]: Normalized coordinates.
+		"""
+		left, top, width, height = self.bounds
+		return (x - left) * 65535 // (width - 1), (y - top) * 65535 // (height - 1)
+
+	def watch_display_changes(self) -> None:
+		"""
+		Invalidate the cached bounds on every screen change; connects only once.
+		"""
+		app = QGuiApplication.instance()
+		if app is None or self._watching:
+			return
+		self._watching = True
+		app.screenAdded.connect(self._on_screen_added)
+		app.screenRemoved.connect(self.invalidate)
+		app.primaryScreenChanged.connect(self.invalidate)
+		for screen in app.screens():
+			self._on_screen_added(screen)
+
+	def _on_screen_added(self, screen) -> None:
+		self.invalidate()
+		screen.geometryChanged.connect(self.invalidate)
+
+
+screen_metrics = ScreenMetrics()
+
+
+def get_cursor_position() -> tuple[int, int]:
+	if windll is None:
+		return 0, 0
+	point = wintypes.POINT()
+	user32.GetCursorPos(byref(point))
+	return point.x, point.y
+
+
+class InputBatch:
+	"""
+	A sequence of mouse and keyboard events compiled into `INPUT` arrays.
+
+	Events between two `settle` calls are injected by a single `SendInput` call, so
+	nothing else can interleave with them; `settle` only splits the batch where the
+	game has to redraw before the next event makes sense, and waits there for a
+	readiness signal when one is given (see `readiness.wait_until`).
+	"""
+	_scan_codes: dict[int, int] = {}
+
+	def __init__(self, metrics: ScreenMetrics = screen_metrics):
+		self.metrics = metrics
+		self._segments: list[tuple[tuple | None, list[INPUT]]] = [(None, [])]
+		self._compiled: list | None = None
+
+	def _add(self, item: INPUT) -> 'InputBatch':
+		self._segments[-1][1].append(item)
+		self._compiled = None
+		return self
+
+	def move(self, point: tuple[int, int]) -> 'InputBatch':
+		dx, dy = self.metrics.normalize(*point)
+		item = INPUT(type=INPUT_MOUSE)
+		item.mi = MOUSEINPUT(dx, dy, 0, MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK, 0, 0)
+		return self._add(item)
+
+	def click(self, point: tuple[int, int]) -> 'InputBatch':
+		self.move(point)
+		for flags in (MOUSEEVENTF_LEFTDOWN, MOUSEEVENTF_LEFTUP):
+			item = INPUT(type=INPUT_MOUSE)
+			item.mi = MOUSEINPUT(0, 0, 0, flags, 0, 0)
+			self._add(item)
+		return self
+
+	def key(self, vk: int, key_up: bool = False) -> 'InputBatch':
+		item = INPUT(type=INPUT_KEYBOARD)
+		item.ki = KEYBDINPUT(vk, self._scan_code(vk), KEYEVENTF_KEYUP if key_up else 0, 0, 0)
+		return self._add(item)
+
+	def chord(self, *vks: int) -> 'InputBatch':
+		"""
+		Press the keys in order and release them in reverse, e.g. `chord(VK_CONTROL, VK_V)`.
+		"""
+		for vk in vks:
+			self.key(vk)
+		for vk in reversed(vks):
+			self.key(vk, key_up=True)
+		return self
+
+	def type_text(self, text: str) -> 'InputBatch':
+		"""
+		Type `text` as Unicode key events, independent of the keyboard layout and the clipboard.
+		"""
+		data = text.encode("utf-16-le")
+		for index in range(0, len(data), 2):
+			# One event pair per UTF-16 code unit; surrogate pairs are sent as two units
+			code_unit = int.from_bytes(data[index:index + 2], "little")
+			for flags in (KEYEVENTF_UNICODE, KEYEVENTF_UNICODE | KEYEVENTF_KEYUP):
+				item = INPUT(type=INPUT_KEYBOARD)
+				item.ki = KEYBDINPUT(0, code_unit, flags, 0, 0)
+				self._add(item)
+		return self
+
+	def settle(self, seconds: float, ready: Callable[[], bool] | None = None, timeout: float = 0.0) -> 'InputBatch':
+		"""
+		Wait before the following events: until `ready` reports True (for at most
+		`timeout` seconds), or for `seconds` when there is no readiness signal or it
+		never confirms.
+		"""
+		self._segments.append(((ready, timeout, seconds), []))
+		self._compiled = None
+		return self
+
+	@classmethod
+	def _scan_code(cls, vk: int) -> int:
+		if vk not in cls._scan_codes:
+			cls._scan_codes[vk] = user32.MapVirtualKeyW(vk, 0) if windll is not None else 0
+		return cls._scan_codes[vk]
+
+	def compile(self) -> list:
+		if self._compiled is None:
+			self._compiled = [
+				(wait, (INPUT * len(items))(*items))
+				for wait, items in self._segments
+				if items
+			]
+		return self._compiled
+
+	def send(self) -> int:
+		"""
+		Inject the batch.
+
+		Returns:
+		- int: Number of events the system accepted.
+		"""
+		sent = 0
+		for wait, items in self.compile():
+			if wait is not None:
+				ready, timeout, fallback = wait
+				wait_until(ready, timeout, fallback)
+			if windll is not None:
+				sent += user32.SendInput(len(items), items, sizeof(INPUT))
+		return sent
+
+
+def paste_text(
+	text: str,
+	field: tuple[int, int],
+	tab: tuple[int, int] | None = None,
+	submit: bool = False,
+	confirm: tuple[int, int] | None = None,
+	settle: float = 0.0,
+	clear: bool = True,
+	ready: Callable[[], bool] | None = None,
+	ready_timeout: float = 0.0,
+	delivery: TextDeliveryMode = "clipboard",
+) -> int:
+	"""
+	Put `text` into a game input field in one batched injection: optionally open
+	a tab first, click the field, select all and clear it, paste or type the text,
+	optionally press enter and click a confirm button, then put the cursor back.
+
+	Args:
+	- text (str): Text to enter.
+	- field (tuple[int, int]): Screen point of the input field.
+	- tab (tuple[int, int] | None): Tab to open before clicking the field.
+	- submit (bool): Press enter after pasting.
+	- confirm (tuple[int, int] | None): Point clicked after submitting.
+	- settle (float): Pause after opening the tab, so the game can show the field.
+	- clear (bool): Clear the field before pasting.
+	- ready (Callable[[], bool] | None): Tells when the opened tab is showing; `settle` becomes its fallback.
+	  Ignored if it already holds before the tab click, since it could not tell the click was handled.
+	- ready_timeout (float): Longest time to wait for `ready`.
+	- delivery (TextDeliveryMode): "clipboard" pastes, "unicode" types and leaves the clipboard untouched.
+
+	Returns:
+	- int: Number of events the system accepted.
+	"""
+	if delivery != "unicode":
+		pyperclip.copy(text)
+	position = get_cursor_position()
+	batch = InputBatch()
+	if tab is not None:
+		batch.click(tab).settle(settle, pending_readiness(ready), ready_timeout)
+	batch.click(field)
+	if clear:
+		batch.chord(VK_CONTROL, VK_A).chord(VK_BACK)
+	if delivery == "unicode":
+		batch.type_text(text)
+	else:
+		batch.chord(VK_CONTROL, VK_V)
+	if submit:
+		batch.chord(VK_RETURN)
+		if confirm is not None:
+			batch.click(confirm)
+	batch.move(position)
+	return batch.send()
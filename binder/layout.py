@@ -0,0 +1,70 @@
+from utils import configuration
+
+# Reference layout: the console at 100% scaling, in pixels from the top-left corner
+# of the game's client area. Everything on screen is derived from these.
+REFERENCE_POINTS = {
+	"console_tab": (55, 375),
+	"console_input": (500, 335),
+	"report_input": (245, 330),
+	"report_input_april": (245, 345),
+	"command_sent": (290, 365),
+	"teleport_sent": (370, 365),
+}
+# Overlay to the right of the console: left offset, top offset, right margin, height
+REFERENCE_OVERLAY = (989, -13, 10, 430)
+
+
+def get_layout_scale(window_height: int, dpi_scale: float) -> float:
+	"""
+	Scale from the reference layout to a window, according to the layout settings.
+
+	Args:
+	- window_height (int): Height of the game's client area.
+	- dpi_scale (float): DPI of the game window divided by 96.
+
+	Returns:
+	- float: Factor applied to every reference offset.
+	"""
+	layout_settings = configuration.settings_config.layout
+	scale = layout_settings.ui_scale
+	if layout_settings.scale_with_dpi:
+		scale *= dpi_scale
+	if layout_settings.scale_with_resolution and window_height > 0:
+		scale *= window_height / layout_settings.reference_height
+	return scale
+
+
+class ScreenLayout:
+	"""
+	Click points and overlay placement for one window geometry.
+
+	Built once per geometry change (see `from_snapshot`), so automation only reads
+	precomputed attributes. Points are absolute screen coordinates named after
+	REFERENCE_POINTS; `overlay_rect` is the overlay's x, y, width and height.
+	"""
+
+	def __init__(self, left: int = 0, top: int = 0, right: int = 0, bottom: int = 0, scale: float = 1.0, dpi: int = 96):
+		self.window_rect = (left, top, right, bottom)
+		self.scale = scale
+		self.dpi = dpi
+		self.console_tab = self.map_point(*REFERENCE_POINTS["console_tab"])
+		self.console_input = self.map_point(*REFERENCE_POINTS["console_input"])
+		self.report_input = self.map_point(*REFERENCE_POINTS["report_input"])
+		self.report_input_april = self.map_point(*REFERENCE_POINTS["report_input_april"])
+		self.command_sent = self.map_point(*REFERENCE_POINTS["command_sent"])
+		self.teleport_sent = self.map_point(*REFERENCE_POINTS["teleport_sent"])
+
+		offset_x, offset_y, margin, height = REFERENCE_OVERLAY
+		overlay_x, overlay_y = self.map_point(offset_x, offset_y)
+		self.overlay_rect = (overlay_x, overlay_y, max(0, right - round(margin * scale) - overlay_x), round(height * scale))
+
+	@classmethod
+	def from_snapshot(cls, snapshot) -> 'ScreenLayout':
+		return cls(*snapshot.window_rect, scale=get_layout_scale(snapshot.window_height, snapshot.scale), dpi=snapshot.dpi)
+
+	def matches(self, snapshot) -> bool:
+		return self.window_rect == snapshot.window_rect and self.dpi == snapshot.dpi
+
+	def map_point(self, x: int, y: int) -> tuple[int, int]:
+		left, top, _, _ = self.window_rect
+		return left + round(x * self.scale), top + round(y * self.scale)
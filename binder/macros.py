@@ -0,0 +1,171 @@
+import string
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from detection import PROBE_TABLE
+from layout import ScreenLayout
+from readiness import TabReadyProbe, pending_readiness, wait_until
+from utils import InputSettings, configuration
+
+# Values a macro command may reference, e.g. "tpcar {gid}"
+MACRO_PLACEHOLDERS = ("user_gid", "gid", "reason", "time")
+
+
+@dataclass(frozen=True)
+class MacroStep:
+	command: str
+	fields: frozenset[str]
+	wait: float | None
+	ready: str | None
+
+
+@dataclass(frozen=True)
+class Macro:
+	"""
+	A validated macro from macros.json: its placeholders are known and its readiness
+	checks name existing tabs, so running it can only fail on input, never on config.
+	"""
+	name: str
+	steps: tuple[MacroStep, ...]
+
+	@property
+	def fields(self) -> frozenset[str]:
+		return frozenset().union(*(step.fields for step in self.steps))
+
+	def build(
+		self,
+		values: dict[str, object],
+		paste: Callable[[str], Callable[[], object]],
+		layout: ScreenLayout,
+		input_settings: InputSettings,
+	) -> 'MacroRun':
+		"""
+		Render every command and resolve every wait, ready to hand to the input executor.
+
+		Args:
+		- values (dict[str, object]): Placeholder values.
+		- paste (Callable[[str], Callable[[], object]]): Builds the input action for one command.
+		- layout (ScreenLayout): Layout used by the readiness probes.
+		- input_settings (InputSettings): Supplies the default waits.
+
+		Returns:
+		- MacroRun: Callable that runs the steps and records their timing.
+		"""
+		probes = {step.ready: TabReadyProbe(step.ready, layout) for step in self.steps if step.ready}
+		steps = []
+		for step in self.steps:
+			wait = input_settings.command_gap if step.wait is None else step.wait
+			command = step.command.format_map(values)
+			steps.append((command, paste(command), wait, probes.get(step.ready)))
+		return MacroRun(self.name, steps, input_settings.ready_timeout)
+
+
+def compile_macro(config: dict) -> Macro:
+	"""
+	Validate one macro from macros.json.
+
+	Args:
+	- config (dict): Macro with `name` and `steps`.
+
+	Returns:
+	- Macro: The compiled macro.
+
+	Raises:
+	- ValueError: If a step uses an unknown placeholder or readiness tab.
+	"""
+	steps = []
+	for step in config.get("steps", []):
+		command = step["command"]
+		fields = frozenset(name for _, name, _, _ in string.Formatter().parse(command) if name is not None)
+		unknown = fields.difference(MACRO_PLACEHOLDERS)
+		if unknown:
+			raise ValueError(f"Macro {config['name']}: unknown placeholders {sorted(unknown)} in {command!r}")
+		ready = step.get("ready")
+		if ready is not None and ready not in PROBE_TABLE.tab_names:
+			raise ValueError(f"Macro {config['name']}: unknown tab {ready!r}")
+		steps.append(MacroStep(command, fields, step.get("wait"), ready))
+	return Macro(config["name"], tuple(steps))
+
+
+@dataclass
+class StepTiming:
+	command: str
+	input_seconds: float
+	wait_seconds: float
+	ready: bool
+
+
+class MacroRun:
+	"""
+	One execution of a macro on the input executor thread. Each step is entered
+	through the batched input path, then the run pauses for the step's `wait`.
+
+	A step's readiness probe only replaces the pause when it can actually change:
+	if its tab was already showing before the command, it carries no signal and the
+	full pause applies. `timings` holds how long each part of the last run took, so
+	the configured waits can be tightened; submitted with `report=run.report`, the
+	executor logs them once the run finishes.
+	"""
+
+	def __init__(self, name: str, steps: list[tuple], ready_timeout: float):
+		self.name = name
+		self.steps = steps
+		self.ready_timeout = ready_timeout
+		self.timings: list[StepTiming] = []
+
+	def __call__(self) -> None:
+		self.timings.clear()
+		for command, paste, wait, ready in self.steps:
+			ready = pending_readiness(ready)
+			start = time.perf_counter()
+			paste()
+			pasted = time.perf_counter()
+			confirmed = wait_until(ready, timeout=self.ready_timeout, fallback=wait)
+			self.timings.append(StepTiming(command, pasted - start, time.perf_counter() - pasted, confirmed))
+
+	def report(self) -> str:
+		steps = ", ".join(
+			f"{timing.command!r} {timing.input_seconds * 1000:.0f}+{timing.wait_seconds * 1000:.0f} ms"
+			+ ("" if timing.ready else " (no readiness)")
+			for timing in self.timings
+		)
+		return f"Macro {self.name}: {sum(t.input_seconds + t.wait_seconds for t in self.timings) * 1000:.0f} ms [{steps}]"
+
+
+class MacroEngine:
+	"""
+	Compiled macros from macros.json, rebuilt only when the file changes.
+
+	The configuration cache hands out the same data object until the file's checksum
+	changes, so identity is enough to tell whether the compiled macros are stale.
+	Invalid macros are reported and skipped.
+	"""
+
+	def __init__(self):
+		self._source: list[dict] | None = None
+		self._macros: dict[str, Macro] = {}
+
+	@property
+	def macros(self) -> dict[str, Macro]:
+		source = configuration.macros_config
+		if source is not self._source:
+			macros = {}
+			for config in source:
+				try:
+					macro = compile_macro(config)
+				except (KeyError, TypeError, ValueError) as e:
+					print(e)
+					continue
+				macros[macro.name] = macro
+			self._source, self._macros = source, macros
+		return self._macros
+
+	def get(self, name: str) -> Macro | None:
+		return self.macros.get(name)
+
+	def names(self) -> list[str]:
+		return list(self.macros)
+
+
+macro_engine = MacroEngine()
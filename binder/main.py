@@ -1,28 +1,52 @@
+import multiprocessing
 import sys
 
-import psutil
 from app import MainApp
-from coordinate_updater import CoordinateUpdater
+from detection_process import RemoteGameStateHub
 from exceptions import setup_excepthook
+from game_process import ACTIVE_PRIORITY, GameProcessMonitor, set_process_priority
+from game_state import GameStateHub
+from input_executor import input_executor
 from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import QApplication
-from utils import configuration, parse_stylesheet
+from stall_watchdog import Watchdog
+from utils import configuration, parse_stylesheet, setup_logging
 
 if __name__ == '__main__':
-    process = psutil.Process()
-    process.nice(psutil.ABOVE_NORMAL_PRIORITY_CLASS)
-
+    multiprocessing.freeze_support()
+    setup_logging()
+    # The GUI sends the input, so it keeps the raised priority in both modes;
+    # an in-process monitor drops it again while the game is not running
+    set_process_priority(ACTIVE_PRIORITY)
     setup_excepthook()
     global app
-    coordinate_updater = CoordinateUpdater()
-    coordinate_updater.start()
+    detection_settings = configuration.settings_config.detection
+    process_monitor = None
+    if detection_settings.separate_process:
+        game_state = RemoteGameStateHub(cpu=detection_settings.process_cpu)
+    else:
+        process_monitor = GameProcessMonitor()
+        process_monitor.start()
+        game_state = GameStateHub(process_monitor)
+    game_state.start()
     app = QApplication(sys.argv)
     style = parse_stylesheet()
     app.setStyleSheet(style)
     app_icon = QIcon(str(configuration.resource_path / 'logo.ico'))
     app.setWindowIcon(app_icon)
-    app.aboutToQuit.connect(coordinate_updater.stop)
-    main_app = MainApp(app=app, coordinate_updater=coordinate_updater)
+    app.aboutToQuit.connect(input_executor.stop)
+    app.aboutToQuit.connect(game_state.stop)
+    main_app = MainApp(app=app, game_state=game_state)
     main_app.show()
-    # keyboard.add_hotkey('F8', coordinate_updater.autologin)
+    watchdog_settings = configuration.settings_config.watchdog
+    # In a separate process, the detection process runs its own watchdog
+    if process_monitor is not None:
+        app.aboutToQuit.connect(process_monitor.stop)
+    if process_monitor is not None and watchdog_settings.enabled:
+        watchdog = Watchdog.from_settings(watchdog_settings)
+        watchdog.watch(process_monitor.heartbeat, process_monitor.restart, watchdog_settings.stall_timeout)
+        watchdog.watch(game_state.heartbeat, game_state.restart, watchdog_settings.stall_timeout)
+        watchdog.stalled.connect(main_app.on_loop_stalled)
+        app.aboutToQuit.connect(watchdog.stop)
+        watchdog.start()
     sys.exit(app.exec())
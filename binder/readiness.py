@@ -0,0 +1,125 @@
+import time
+from typing import Callable
+
+import numpy as np
+from capture import CaptureBackend, create_capture_backend, get_points_rect
+from detection import PROBE_TABLE, TOLERANCE, ProbeTable
+from layout import ScreenLayout
+from utils import configuration
+
+_capture_backend: CaptureBackend | None = None
+
+
+def get_capture_backend() -> CaptureBackend:
+	"""
+	Backend shared by all readiness probes, created on first use.
+	"""
+	global _capture_backend
+	if _capture_backend is None:
+		_capture_backend = create_capture_backend(configuration.settings_config.detection.capture_backend)
+	return _capture_backend
+
+
+# Tabs drawn over the console input: while one of them shows, the input cannot be clicked
+CONSOLE_INPUT_COVERED_BY = ("reports_tab", "teleport_tab")
+
+
+class TabReadyProbe:
+	"""
+	Tells whether a console tab is showing, by checking only that tab's probes from PROBE_TABLE.
+	`hidden_tabs` must not be showing at the same time, for tabs drawn over one another.
+
+	Cheap enough to poll every few milliseconds: one capture of the probes' bounding box.
+	"""
+
+	def __init__(
+		self,
+		tab_name: str,
+		layout: ScreenLayout,
+		probe_table: ProbeTable = PROBE_TABLE,
+		capture_backend: CaptureBackend | None = None,
+		hidden_tabs: tuple[str, ...] = (),
+	):
+		left, top, right, bottom = layout.window_rect
+		xs, ys = probe_table.get_positions(right, bottom, left, top, layout.scale)
+		groups = [probe_table.tab_groups[probe_table.tab_names.index(name)] for name in (tab_name, *hidden_tabs)]
+		probes = np.concatenate(groups)
+		self.xs, self.ys = xs[probes], ys[probes]
+		self.colors = probe_table.colors[probes]
+		# Where each tab's probes start and end; the first tab is the one that must show
+		self.bounds = np.cumsum([0, *map(len, groups)])
+		self.rect = get_points_rect(self.xs, self.ys)
+		self.capture_backend = capture_backend
+
+	def __call__(self) -> bool:
+		capture_backend = self.capture_backend or get_capture_backend()
+		colors = capture_backend.read_pixels(self.xs, self.ys, self.rect)
+		matches = np.all(np.abs(colors.astype(np.int16) - self.colors) <= TOLERANCE, axis=1)
+		shown = [bool(matches[start:end].all()) for start, end in zip(self.bounds, self.bounds[1:])]
+		return shown[0] and not any(shown[1:])
+
+
+def console_input_probe(layout: ScreenLayout, capture_backend: CaptureBackend | None = None) -> TabReadyProbe:
+	"""
+	Readiness signal for console pastes: the console tab shows and no tab covers its input.
+	The console tab's own probes match under every binder tab, so alone they would confirm
+	before the tab click has been handled.
+	"""
+	return TabReadyProbe("console_tab", layout, capture_backend=capture_backend, hidden_tabs=CONSOLE_INPUT_COVERED_BY)
+
+
+def pending_readiness(ready: Callable[[], bool] | None) -> Callable[[], bool] | None:
+	"""
+	Keep a readiness signal only if it can still change.
+
+	A signal that already holds before the input is sent would confirm at once and
+	skip the pause the input needs, so it is dropped and the fixed pause applies.
+
+	Args:
+	- ready (Callable[[], bool] | None): Readiness signal.
+
+	Returns:
+	- Callable[[], bool] | None: `ready`, or None if it already reports ready.
+	"""
+	if ready is None:
+		return None
+	try:
+		return None if ready() else ready
+	except OSError:
+		# Unreadable now; wait_until falls back to the fixed pause if it stays so
+		return ready
+
+
+def wait_until(ready: Callable[[], bool] | None, timeout: float, fallback: float, poll_interval: float = 0.01) -> bool:
+	"""
+	Wait until the game is ready instead of for a fixed delay.
+
+	`ready` is polled every `poll_interval` seconds for at most `timeout` seconds.
+	If it never reports ready (or cannot be read), the wait is stretched to the
+	`fallback` delay that was used before readiness checks existed.
+
+	Args:
+	- ready (Callable[[], bool] | None): Readiness signal; None waits for `fallback`.
+	- timeout (float): Longest time to poll.
+	- fallback (float): Delay to honor when readiness is not confirmed.
+	- poll_interval (float): Pause between polls.
+
+	Returns:
+	- bool: True if readiness was confirmed.
+	"""
+	start = time.perf_counter()
+	if ready is not None:
+		deadline = start + timeout
+		try:
+			while True:
+				if ready():
+					return True
+				if time.perf_counter() >= deadline:
+					break
+				time.sleep(poll_interval)
+		except OSError as e:
+			print(e)
+	remaining = fallback - (time.perf_counter() - start)
+	if remaining > 0:
+		time.sleep(remaining)
+	return False
@@ -0,0 +1,255 @@
+import argparse
+import json
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from capture import FakeCaptureBackend, Frame
+from detection import (FrameChangeGate, ProbeGeometry, TabDetector,
+					   TabStateDebouncer)
+
+MAGIC = b"BREC"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHI")
+# timestamp, window left/top/right/bottom, layout scale, capture left/top/width/height, tabs bitmask, payload length
+RECORD = struct.Struct("<d4if4iII")
+
+
+def encode_tabs_state(tab_names: list[str], tabs_state: dict[str, bool]) -> int:
+	return sum(1 << index for index, tab_name in enumerate(tab_names) if tabs_state.get(tab_name))
+
+def decode_tabs_state(tab_names: list[str], mask: int) -> dict[str, bool]:
+	return {tab_name: bool(mask >> index & 1) for index, tab_name in enumerate(tab_names)}
+
+
+class DetectionRecorder:
+	"""
+	Appends console-region captures and the tab states detected for them to a `.binrec` file.
+
+	A tick is written only when the frame, the window geometry or the tab states
+	changed, and a frame identical to the previous one is stored as an empty payload,
+	so a session of idle console time costs a few bytes per change.
+	"""
+
+	def __init__(self, path: str | Path, tab_names: list[str]):
+		self.path = Path(path)
+		self.tab_names = tab_names
+		self._file = self.path.open("wb")
+		header = json.dumps({"tab_names": tab_names, "created": datetime.now().isoformat()}).encode("utf-8")
+		self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(header)))
+		self._file.write(header)
+		self._started = time.monotonic()
+		self._last_key = None
+		self._last_frame_crc = None
+
+	@classmethod
+	def create(cls, directory: Path, tab_names: list[str]) -> 'DetectionRecorder':
+		directory.mkdir(parents=True, exist_ok=True)
+		return cls(directory / f"{datetime.now():%Y%m%d-%H%M%S}.binrec", tab_names)
+
+	def record(self, geometry: ProbeGeometry, frame: Frame, tabs_state: dict[str, bool], now: float | None = None) -> None:
+		now = time.monotonic() if now is None else now
+		pixels = np.ascontiguousarray(frame.pixels[..., :3]).tobytes()
+		frame_crc = zlib.crc32(pixels)
+		capture_rect = (frame.left, frame.top, frame.width, frame.height)
+		mask = encode_tabs_state(self.tab_names, tabs_state)
+		key = (geometry.window_rect, geometry.scale, capture_rect, mask, frame_crc)
+		if key == self._last_key:
+			return
+
+		payload = b"" if frame_crc == self._last_frame_crc else zlib.compress(pixels, 1)
+		self._file.write(RECORD.pack(now - self._started, *geometry.window_rect, geometry.scale, *capture_rect, mask, len(payload)))
+		self._file.write(payload)
+		self._file.flush()
+		self._last_key = key
+		self._last_frame_crc = frame_crc
+
+	def close(self) -> None:
+		self._file.close()
+
+
+@dataclass
+class RecordedTick:
+	timestamp: float
+	window_rect: tuple[int, int, int, int]
+	capture_rect: tuple[int, int, int, int]
+	tabs_state: dict[str, bool]
+	payload: bytes
+	scale: float = 1.0
+
+	def get_pixels(self) -> np.ndarray:
+		"""
+		Decode the frame.
+
+		Returns:
+		- np.ndarray: Array of shape (height, width, 3) in RGB order.
+		"""
+		_, _, width, height = self.capture_rect
+		bgr = np.frombuffer(zlib.decompress(self.payload), dtype=np.uint8).reshape(height, width, 3)
+		return bgr[..., ::-1]
+
+
+def read_recording(path: str | Path) -> tuple[list[str], list[RecordedTick]]:
+	with Path(path).open("rb") as file:
+		magic, version, header_length = HEADER.unpack(file.read(HEADER.size))
+		if magic != MAGIC or version != FORMAT_VERSION:
+			raise ValueError(f"Unsupported recording: {path}")
+		tab_names = json.loads(file.read(header_length))["tab_names"]
+
+		ticks: list[RecordedTick] = []
+		payload = b""
+		while chunk := file.read(RECORD.size):
+			if len(chunk) < RECORD.size:
+				break  # Truncated by a crash mid-write
+			timestamp, *values, mask, payload_length = RECORD.unpack(chunk)
+			if payload_length:
+				payload = file.read(payload_length)
+			ticks.append(RecordedTick(
+				timestamp=timestamp,
+				window_rect=tuple(values[:4]),
+				capture_rect=tuple(values[5:]),
+				tabs_state=decode_tabs_state(tab_names, mask),
+				payload=payload,
+				scale=values[4],
+			))
+	return tab_names, ticks
+
+
+@dataclass
+class ReplayReport:
+	ticks: int = 0
+	tick_costs: list[float] = field(default_factory=list)
+	latencies: list[float] = field(default_factory=list)
+	false_transitions: int = 0
+	suppressed_transitions: int = 0
+	missed_transitions: int = 0
+	# Frame-change gate counters, when the replay ran with one
+	gate_hits: int = 0
+	gate_misses: int = 0
+
+	def summary(self) -> str:
+		costs = np.array(self.tick_costs or [0.0]) * 1000
+		latencies = np.array(self.latencies or [0.0]) * 1000
+		gate_ticks = self.gate_hits + self.gate_misses
+		return "\n".join([
+			f"Ticks: {self.ticks}",
+			f"Tick cost, ms: mean {costs.mean():.3f}, p50 {np.percentile(costs, 50):.3f}, p95 {np.percentile(costs, 95):.3f}, max {costs.max():.3f}",
+			f"Detection latency, ms: mean {latencies.mean():.1f}, p95 {np.percentile(latencies, 95):.1f}, max {latencies.max():.1f} ({len(self.latencies)} transitions)",
+			f"False transitions: {self.false_transitions}",
+			f"Suppressed transitions: {self.suppressed_transitions}",
+			f"Missed transitions: {self.missed_transitions}",
+			*([f"Change gate: {self.gate_hits} hits, {self.gate_misses} misses ({self.gate_hits / gate_ticks:.0%})"] if gate_ticks else []),
+		])
+
+
+def replay(
+	path: str | Path,
+	interval: float = 0.2,
+	tail: float = 1.0,
+	change_gate: FrameChangeGate | None = None,
+	debouncer_factory=TabStateDebouncer,
+) -> ReplayReport:
+	"""
+	Drive a TabDetector from a recording with a simulated clock.
+
+	The detector polls every `interval` seconds of recording time and sees the
+	latest recorded frame at that moment. Recording stops writing while nothing
+	changes, so the replay keeps polling the last frame for `tail` seconds to let
+	pending debounced transitions settle. The recorded tab states are the reference:
+	a detector transition towards the recorded state is timed as latency, one that
+	disagrees with it is a false transition, and a recorded transition that reverted
+	before the detector followed it counts as suppressed.
+
+	Args:
+	- path (str | Path): Recording to replay.
+	- interval (float): Simulated poll interval, in seconds.
+	- tail (float): Extra time polled after the last recorded tick, in seconds.
+	- change_gate (FrameChangeGate | None): Gate to run the detector with.
+	- debouncer_factory: Callable building a debouncer from tab names, or None to disable debouncing.
+
+	Returns:
+	- ReplayReport: Collected metrics.
+	"""
+	tab_names, ticks = read_recording(path)
+	report = ReplayReport()
+	if not ticks:
+		return report
+
+	backend = FakeCaptureBackend(np.zeros((1, 1, 3), dtype=np.uint8))
+	detector = TabDetector(
+		capture_backend=backend,
+		change_gate=change_gate,
+		debouncer=debouncer_factory(tab_names) if debouncer_factory else None,
+	)
+	reference = dict.fromkeys(tab_names, False)
+	output = dict.fromkeys(tab_names, False)
+	pending: dict[str, tuple[bool, float]] = {}
+	current_payload = None
+	current_window = None
+	index = -1
+
+	now = ticks[0].timestamp
+	while now <= ticks[-1].timestamp + tail:
+		while index + 1 < len(ticks) and ticks[index + 1].timestamp <= now:
+			index += 1
+			for tab_name, is_open in ticks[index].tabs_state.items():
+				if is_open == reference[tab_name]:
+					continue
+				reference[tab_name] = is_open
+				if is_open == output[tab_name]:
+					pending.pop(tab_name, None)
+					report.suppressed_transitions += 1
+				else:
+					pending[tab_name] = (is_open, ticks[index].timestamp)
+
+		tick = ticks[index]
+		if tick.payload is not current_payload:
+			backend.set_pixels(tick.get_pixels(), *tick.capture_rect[:2])
+			current_payload = tick.payload
+		if (tick.window_rect, tick.scale) != current_window:
+			detector.set_geometry(*tick.window_rect, tick.scale)
+			current_window = (tick.window_rect, tick.scale)
+
+		started = time.perf_counter()
+		tabs_state = detector.detect(now)
+		report.tick_costs.append(time.perf_counter() - started)
+		report.ticks += 1
+
+		for tab_name, is_open in (tabs_state or {}).items():
+			if is_open == output[tab_name]:
+				continue
+			output[tab_name] = is_open
+			expected = pending.get(tab_name)
+			if expected and expected[0] == is_open:
+				report.latencies.append(now - expected[1])
+				del pending[tab_name]
+			elif is_open != reference[tab_name]:
+				report.false_transitions += 1
+		now += interval
+
+	report.missed_transitions = len(pending)
+	if change_gate is not None:
+		report.gate_hits, report.gate_misses = change_gate.hits, change_gate.misses
+	detector.close()
+	return report
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Replay a tab-detection recording and report detector metrics.")
+	parser.add_argument("recording", type=Path)
+	parser.add_argument("--interval", type=float, default=0.2, help="Simulated poll interval, seconds")
+	parser.add_argument("--no-gate", action="store_true", help="Disable the frame-change gate")
+	parser.add_argument("--no-debounce", action="store_true", help="Disable open/close debouncing")
+	args = parser.parse_args()
+
+	result = replay(
+		args.recording,
+		interval=args.interval,
+		change_gate=None if args.no_gate else FrameChangeGate(),
+		debouncer_factory=None if args.no_debounce else TabStateDebouncer,
+	)
+	print(result.summary())
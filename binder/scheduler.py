@@ -0,0 +1,109 @@
+import threading
+import time
+
+
+class AdaptivePollScheduler:
+	"""
+	Decides how long the detection loop sleeps between ticks.
+
+	The interval starts at `min_interval` and grows by `backoff_factor` after every
+	tick that saw no change, up to `max_interval`. A change resets it. `burst` switches
+	to `burst_interval` for `burst_duration` seconds and wakes a sleeping loop at once;
+	`stop` wakes it too, so shutting down never waits for a full sleep.
+
+	`trigger` is for events that probably changed the console (focus changes):
+	it wakes the loop for an immediate check and schedules one confirmation tick
+	`confirm_delay` seconds later. `wake` only ends the current
+	sleep, without touching the cadence.
+	"""
+
+	def __init__(
+		self,
+		min_interval: float = 0.2,
+		max_interval: float = 1.0,
+		burst_interval: float = 0.05,
+		burst_duration: float = 1.5,
+		backoff_factor: float = 1.5,
+		confirm_delay: float = 0.15,
+	):
+		self.min_interval = min_interval
+		self.max_interval = max(max_interval, min_interval)
+		self.burst_interval = burst_interval
+		self.burst_duration = burst_duration
+		self.backoff_factor = max(backoff_factor, 1.0)
+		self.confirm_delay = confirm_delay
+		self._interval = min_interval
+		self._burst_until = 0.0
+		self._confirm_at = 0.0
+		self._wake_event = threading.Event()
+		self._running = True
+
+	@classmethod
+	def from_settings(cls, settings) -> 'AdaptivePollScheduler':
+		return cls(
+			min_interval=settings.min_interval,
+			max_interval=settings.max_interval,
+			burst_interval=settings.burst_interval,
+			burst_duration=settings.burst_duration,
+			backoff_factor=settings.backoff_factor,
+			confirm_delay=settings.confirm_delay,
+		)
+
+	@property
+	def running(self) -> bool:
+		return self._running
+
+	@property
+	def interval(self) -> float:
+		now = time.monotonic()
+		interval = min(self.burst_interval, self._interval) if now < self._burst_until else self._interval
+		if now < self._confirm_at:
+			interval = min(interval, self._confirm_at - now)
+		return interval
+
+	def record(self, changed: bool) -> None:
+		if changed:
+			self._interval = self.min_interval
+		else:
+			self._interval = min(self._interval * self.backoff_factor, self.max_interval)
+
+	def burst(self) -> None:
+		self._burst_until = time.monotonic() + self.burst_duration
+		self._interval = self.min_interval
+		self._wake_event.set()
+
+	def wake(self) -> None:
+		self._wake_event.set()
+
+	def trigger(self) -> None:
+		self._confirm_at = time.monotonic() + self.confirm_delay
+		self._wake_event.set()
+
+	def wait(self, timeout: float | None = None) -> bool:
+		"""
+		Sleep until the next tick is due or the loop is woken.
+
+		Args:
+		- timeout (float | None): Sleep length; the adaptive interval when None.
+
+		Returns:
+		- bool: False once the scheduler has been stopped.
+		"""
+		self._wake_event.wait(self.interval if timeout is None else timeout)
+		self._wake_event.clear()
+		return self._running
+
+	def park(self) -> bool:
+		"""
+		Sleep with no timeout, until `wake`, `trigger`, `burst` or `stop` is called.
+
+		Returns:
+		- bool: False once the scheduler has been stopped.
+		"""
+		self._wake_event.wait()
+		self._wake_event.clear()
+		return self._running
+
+	def stop(self) -> None:
+		self._running = False
+		self._wake_event.set()
@@ -1,3 +1,4 @@
+from macros import macro_engine
 from PyQt6.QtCore import QEasingCurve, QObject, QPropertyAnimation, Qt
 from PyQt6.QtGui import QColor, QFont, QIntValidator
 from PyQt6.QtWidgets import (QAbstractItemView, QApplication, QCheckBox,
@@ -57,7 +58,8 @@ class ConfigSettingsWindow(DraggableWidget):
 		self.main_layout.addLayout(titles_layout)
 		for button_name in reversed(self.visible_buttons):
 			self.add_button_row(button_name=button_name, layout=self.preview_buttons_layout, controls=self.visible_buttons_controls)
-		for button_name in [button for button in ADDITIONAL_BUTTONS.keys() if button not in self.visible_buttons]:
+		available_buttons = dict.fromkeys([*ADDITIONAL_BUTTONS, *macro_engine.names()])
+		for button_name in [button for button in available_buttons if button not in self.visible_buttons]:
 			self.add_button_row(button_name=button_name, layout=self.available_buttons_layout, controls=self.available_buttons_controls)
 
 		self.preview_buttons_layout.setContentsMargins(10, 0, 20, 0)
@@ -0,0 +1,123 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+
+class Heartbeat:
+	"""
+	Tick timing of one background loop, read by the Watchdog.
+
+	A loop wraps each unit of work in `with heartbeat.tick():`. Time spent between
+	ticks (sleeping, parked, waiting for the game) never counts as a stall.
+	"""
+
+	def __init__(self, name: str):
+		self.name = name
+		self.ticks = 0
+		self.last_tick_duration = 0.0
+		self.max_tick_duration = 0.0
+		self.tick_started: float | None = None
+
+	@contextmanager
+	def tick(self):
+		started = time.monotonic()
+		self.tick_started = started
+		try:
+			yield
+		finally:
+			duration = time.monotonic() - started
+			if self.tick_started == started:
+				self.tick_started = None
+			self.ticks += 1
+			self.last_tick_duration = duration
+			self.max_tick_duration = max(self.max_tick_duration, duration)
+
+	def abandon(self) -> None:
+		# The stalled tick belongs to a thread that has been replaced
+		self.tick_started = None
+
+	def stalled_for(self, now: float) -> float:
+		tick_started = self.tick_started
+		return 0.0 if tick_started is None else now - tick_started
+
+
+@dataclass
+class WatchedLoop:
+	heartbeat: Heartbeat
+	restart: Callable[[], None]
+	timeout: float
+	backoff: float
+	restarts: int = 0
+	next_restart_at: float = 0.0
+	ticks_at_restart: int = 0
+
+
+class Watchdog(QThread):
+	"""
+	Checks the heartbeats of the background loops every `check_interval` seconds.
+
+	A loop whose current tick has run longer than its timeout is reported through
+	`stalled` and restarted. A loop that stalls again is restarted only after a delay
+	that doubles from `min_backoff` up to `max_backoff`, and the delay resets once the
+	loop has completed ticks since its last restart.
+	Signals:
+	- stalled(str, float): Loop name and how long its tick has been running, in seconds.
+	"""
+	stalled = pyqtSignal(str, float)
+
+	def __init__(self, check_interval: float = 1.0, min_backoff: float = 2.0, max_backoff: float = 60.0):
+		super().__init__()
+		self.check_interval = check_interval
+		self.min_backoff = min_backoff
+		self.max_backoff = max_backoff
+		self.loops: list[WatchedLoop] = []
+		self._stop_event = threading.Event()
+
+	@classmethod
+	def from_settings(cls, settings) -> 'Watchdog':
+		return cls(
+			check_interval=settings.check_interval,
+			min_backoff=settings.min_backoff,
+			max_backoff=settings.max_backoff,
+		)
+
+	def watch(self, heartbeat: Heartbeat, restart: Callable[[], None], timeout: float) -> None:
+		self.loops.append(WatchedLoop(heartbeat, restart, timeout, self.min_backoff))
+
+	def run(self):
+		while not self._stop_event.wait(self.check_interval):
+			self.check(time.monotonic())
+
+	def check(self, now: float) -> None:
+		for loop in self.loops:
+			heartbeat = loop.heartbeat
+			if loop.restarts and heartbeat.ticks > loop.ticks_at_restart and not heartbeat.tick_started:
+				# Healthy again since the last restart
+				loop.backoff = self.min_backoff
+			stalled_for = heartbeat.stalled_for(now)
+			if stalled_for < loop.timeout or now < loop.next_restart_at:
+				continue
+
+			print(
+				f"Watchdog: {heartbeat.name} stalled for {stalled_for:.1f} s "
+				f"(last tick {heartbeat.last_tick_duration * 1000:.1f} ms, max {heartbeat.max_tick_duration * 1000:.1f} ms, "
+				f"{heartbeat.ticks} ticks, {loop.restarts} restarts), restarting"
+			)
+			self.stalled.emit(heartbeat.name, stalled_for)
+			try:
+				loop.restart()
+			except Exception as e:
+				print(e)
+			heartbeat.abandon()
+			loop.restarts += 1
+			loop.ticks_at_restart = heartbeat.ticks
+			loop.next_restart_at = now + loop.backoff
+			loop.backoff = min(loop.backoff * 2, self.max_backoff)
+
+	def stop(self):
+		self._stop_event.set()
+		self.wait()
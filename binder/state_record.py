@@ -0,0 +1,39 @@
+import struct
+import time
+
+# sequence (odd while a write is in progress), process id (-1 when the game is not running),
+# hwnd, client left/top/right/bottom, dpi, tabs bitmask
+STATE_RECORD = struct.Struct("<IqQ4iIQ")
+SEQUENCE = struct.Struct("<I")
+NO_PROCESS = -1
+
+
+def write_record(buffer, sequence: int, fields: tuple) -> None:
+	"""
+	Write one record under a sequence lock: the sequence is odd while the fields change.
+
+	Args:
+	- buffer: Shared memory buffer holding the record.
+	- sequence (int): Last sequence written; must be even.
+	- fields (tuple): Every STATE_RECORD field after the sequence.
+	"""
+	SEQUENCE.pack_into(buffer, 0, sequence + 1)
+	STATE_RECORD.pack_into(buffer, 0, sequence + 1, *fields)
+	SEQUENCE.pack_into(buffer, 0, sequence + 2)
+
+
+def read_record(buffer) -> tuple[int, tuple]:
+	"""
+	Read a consistent record, retrying while a write is in progress.
+
+	Args:
+	- buffer: Shared memory buffer holding the record.
+
+	Returns:
+	- tuple[int, tuple]: Number of completed writes and every field after the sequence.
+	"""
+	while True:
+		sequence, *fields = STATE_RECORD.unpack_from(buffer, 0)
+		if sequence % 2 == 0 and SEQUENCE.unpack_from(buffer, 0)[0] == sequence:
+			return sequence // 2, tuple(fields)
+		time.sleep(0)
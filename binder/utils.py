@@ -1,5 +1,6 @@
 import hashlib
 import json
+import logging
 import os
 import platform
 import re
@@ -8,16 +9,15 @@ import sys
 import urllib.request
 import uuid
 import zlib
-from concurrent.futures import ThreadPoolExecutor
-from ctypes import Structure, c_ulong, pointer, windll
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Literal
 
 # import hwid
 import sslcrypto
 from pydantic import BaseModel, Field, ValidationError
-from PyQt6.QtCore import QMargins, QSize, Qt
-from PyQt6.QtGui import QColor, QFont, QIcon, QMouseEvent, QPixmap, QCursor
+from PyQt6.QtCore import QMargins, QPoint, QRect, QSize, Qt, QTimer
+from PyQt6.QtGui import QColor, QFont, QGuiApplication, QIcon, QMouseEvent, QPixmap, QCursor
 from PyQt6.QtWidgets import (QHBoxLayout, QLabel, QLineEdit, QPushButton,
                              QScrollArea, QWidget)
 from pyqttoast import (Toast, ToastButtonAlignment, ToastIcon, ToastPosition,
@@ -26,6 +26,7 @@ from pyqttoast import (Toast, ToastButtonAlignment, ToastIcon, ToastPosition,
 __location__ = os.getcwd()
 
 DATE_FORMAT = "%d.%m.%Y"
+LOG_FORMAT = "%(asctime)s %(name)s: %(message)s"
 ADDITIONAL_BUTTONS = {
 	"prison": "punish",
 	"mute": "punish",
@@ -62,68 +63,6 @@ icons_map = {
 }
 
 
-TOLERANCE = 5
-
-class TabPixelInfo:
-	__slots__ = ('x', 'y', 'color', 'left_side', 'top_side')
-	def __init__(self, x: int, y: int, color: tuple[int, int, int], left_side: bool, top_side: bool):
-		self.x = x
-		self.y = y
-		self.color = color
-		self.left_side = left_side
-		self.top_side = top_side
-
-PIXEL_MAP = {
-	"admin_panel": [
-		TabPixelInfo(940, 360, (85, 85, 85), True, True),
-		TabPixelInfo(940, 385, (85, 85, 85), True, True),
-	],
-	"console_tab": [
-		TabPixelInfo(12, 12, (255, 255, 255), True, True),
-		TabPixelInfo(12, 60, (255, 255, 255), True, True),
-		TabPixelInfo(20, 370, (68, 68, 68), True, True),
-		TabPixelInfo(70, 370, (68, 68, 68), True, True),
-	],
-	"reports_tab": [
-		TabPixelInfo(250, 370, (68, 68, 68), True, True),
-		TabPixelInfo(305, 336, (68, 68, 68), True, True),
-	],
-	"teleport_tab": [
-		TabPixelInfo(340, 370, (68, 68, 68), True, True),
-		TabPixelInfo(420, 370, (68, 68, 68), True, True),
-	],
-}
-
-def read_pixel(x: int, y: int) -> tuple[int, int, int]:
-	hdc = windll.user32.GetDC(0)
-	pixel = windll.gdi32.GetPixel(hdc, x, y)
-	windll.user32.ReleaseDC(0, hdc)
-	return (pixel & 0xFF, (pixel >> 8) & 0xFF, (pixel >> 16) & 0xFF)
-
-def is_color_within_tolerance(color: tuple[int, int, int], target: tuple[int, int, int]) -> bool:
-	return all(abs(color[i] - target[i]) <= TOLERANCE for i in range(3))
-
-def check_tab_state(tab_name: str, pixel_info: list[TabPixelInfo], right: int, bottom: int, left: int, top: int) -> tuple[str, bool]:
-	for info in pixel_info:
-		adjusted_x = left + info.x if info.left_side else right - info.x
-		adjusted_y = top + info.y if info.top_side else bottom - info.y
-
-		try:
-			if not is_color_within_tolerance(read_pixel(adjusted_x, adjusted_y), info.color):
-				return tab_name, False
-		except Exception as e:
-			return tab_name, False
-
-	return tab_name, True
-
-def get_tabs_state(right: int, bottom: int, left: int, top: int) -> dict[str, bool]:
-	with ThreadPoolExecutor() as executor:
-		return dict(executor.map(
-			lambda item: check_tab_state(item[0], item[1], right, bottom, left, top),
-			PIXEL_MAP.items()
-		))
-
-
 class HWIDGenerator:
 	def __init__(self):
 		self.attributes = {
@@ -228,10 +167,33 @@ def calculate_crc32(file_path: str) -> str:
 		return None
 
 
+def setup_logging() -> None:
+	"""
+	Log to stderr at the level named by BINDER_LOG_LEVEL (INFO by default).
+	Diagnostics such as the change-gate and idle counters are logged at DEBUG.
+	"""
+	logging.basicConfig(level=os.environ.get("BINDER_LOG_LEVEL", "INFO").upper(), format=LOG_FORMAT)
+
+
 def default_visible_buttons():
 	return ["dimension_sync", "car_sync", "uncuff", "reof"]
 
 
+def default_macros():
+	return [
+		{
+			"name": "car_sync",
+			"steps": [
+				{"command": "dimension {user_gid} 1"},
+				{"command": "tpcar {gid}"},
+				{"command": "veh_repair {gid}"},
+				{"command": "dimension {user_gid} 0"},
+				{"command": "tpcar {gid}"},
+			],
+		},
+	]
+
+
 # Data Models
 class DefaultReasons(BaseModel):
 	uncuff: str = Field(default="Поблизости никого нет")
@@ -263,13 +225,73 @@ class AutoSendStructure(BaseModel):
 	teleports: bool = Field(default=True)
 	commands: bool = Field(default=True)
 
+# How text reaches a game field: pasted from the clipboard, or typed as Unicode key events
+TextDeliveryMode = Literal["clipboard", "unicode"]
+
+class TextDeliveryStructure(BaseModel):
+	reports: TextDeliveryMode = Field(default="clipboard")
+	violations: TextDeliveryMode = Field(default="clipboard")
+	teleports: TextDeliveryMode = Field(default="clipboard")
+	commands: TextDeliveryMode = Field(default="clipboard")
+
+class DetectionSettings(BaseModel):
+	capture_backend: str = Field(default="blit")
+	scheduling: str = Field(default="inline")
+	event_triggers: bool = Field(default=True)
+	change_gate: bool = Field(default=True)
+	gate_radius: int = Field(default=4)
+	gate_step: int = Field(default=2)
+	open_samples: int = Field(default=1)
+	open_dwell: float = Field(default=0.0)
+	close_samples: int = Field(default=2)
+	close_dwell: float = Field(default=0.3)
+	recording: bool = Field(default=False)
+	suspend_in_background: bool = Field(default=True)
+	separate_process: bool = Field(default=False)
+	process_cpu: int = Field(default=-1)
+
+class PollingSettings(BaseModel):
+	min_interval: float = Field(default=0.2)
+	max_interval: float = Field(default=1.0)
+	burst_interval: float = Field(default=0.05)
+	burst_duration: float = Field(default=1.5)
+	backoff_factor: float = Field(default=1.5)
+	confirm_delay: float = Field(default=0.15)
+	event_max_interval: float = Field(default=2.0)
+	console_open_interval: float = Field(default=0.2)
+
+class LayoutSettings(BaseModel):
+	ui_scale: float = Field(default=1.0)
+	scale_with_dpi: bool = Field(default=True)
+	scale_with_resolution: bool = Field(default=False)
+	reference_height: int = Field(default=1080)
+
+class InputSettings(BaseModel):
+	tab_settle: float = Field(default=0.1)
+	ready_timeout: float = Field(default=0.3)
+	# Pause between chained commands: the server's reaction has no pixel to wait for
+	command_gap: float = Field(default=1.0)
+
+class WatchdogSettings(BaseModel):
+	enabled: bool = Field(default=True)
+	stall_timeout: float = Field(default=10.0)
+	check_interval: float = Field(default=1.0)
+	min_backoff: float = Field(default=2.0)
+	max_backoff: float = Field(default=60.0)
+
 class SettingsStructure(BaseModel):
 	user_gid: int = Field(default=1)
 	button_style: ButtonStyle = Field(default_factory=ButtonStyle)
 	visible_buttons: list[str] = Field(default_factory=default_visible_buttons)
 	default_reasons: DefaultReasons = Field(default_factory=DefaultReasons)
 	auto_send: AutoSendStructure = Field(default_factory=AutoSendStructure)
+	text_delivery: TextDeliveryStructure = Field(default_factory=TextDeliveryStructure)
 	show_update_info: bool = Field(default=True)
+	detection: DetectionSettings = Field(default_factory=DetectionSettings)
+	polling: PollingSettings = Field(default_factory=PollingSettings)
+	layout: LayoutSettings = Field(default_factory=LayoutSettings)
+	watchdog: WatchdogSettings = Field(default_factory=WatchdogSettings)
+	input: InputSettings = Field(default_factory=InputSettings)
 
 class FileSettingsStructure(BaseModel):
 	data: SettingsStructure = Field(default_factory=SettingsStructure)
@@ -279,6 +301,21 @@ class ConfigStructure(BaseModel):
 	data: list = Field(default_factory=list)
 	version: int = Field(default=1)
 
+class MacroStepStructure(BaseModel):
+	command: str
+	# Pause after the command; None uses input.command_gap
+	wait: float | None = Field(default=None)
+	# Tab the command opens: the pause ends as soon as it shows, with `wait` as the fallback
+	ready: str | None = Field(default=None)
+
+class MacroStructure(BaseModel):
+	name: str
+	steps: list[MacroStepStructure] = Field(default_factory=list)
+
+class MacrosConfigStructure(BaseModel):
+	data: list[MacroStructure] = Field(default_factory=lambda: [MacroStructure(**macro) for macro in default_macros()])
+	version: int = Field(default=1)
+
 class ClickDataStructure(BaseModel):
 	data: dict[str, int] = Field(default_factory=dict)
 	version: int = Field(default=1)
@@ -286,7 +323,7 @@ class ClickDataStructure(BaseModel):
 class Configuration:
 	data_path = Path(__location__) / "data"
 	configs_path = data_path / "configs"
-	config_names = ["reports", "violations", "teleports"]
+	config_names = ["reports", "violations", "teleports", "macros"]
 
 	def __init__(self):
 		self._cache = {}
@@ -313,6 +350,7 @@ class Configuration:
 		self._validate_and_save_config("reports", ConfigStructure)
 		self._validate_and_save_config("violations", ConfigStructure)
 		self._validate_and_save_config("teleports", ConfigStructure)
+		self._validate_and_save_config("macros", MacrosConfigStructure)
 		self._validate_and_save_config("click_data", ClickDataStructure)
 		self._validate_and_save_config("settings", FileSettingsStructure)
 
@@ -360,7 +398,8 @@ class Configuration:
 			'violations': 'violations.json',
 			'reports': 'reports.json',
 			'settings': 'settings.json',
-			'teleports': 'teleports.json'
+			'teleports': 'teleports.json',
+			'macros': 'macros.json'
 		}
 		file_name = file_mapping.get(config_name)
 		if file_name:
@@ -369,6 +408,8 @@ class Configuration:
 				data = FileSettingsStructure(data=SettingsStructure(**data)).model_dump()
 			elif config_name == 'click_data':
 				data = ClickDataStructure(data=data).model_dump()
+			elif config_name == 'macros':
+				data = MacrosConfigStructure(data=data).model_dump()
 			else:
 				data = ConfigStructure(data=data).model_dump()
 			self._save_config(file_path, data)
@@ -400,6 +441,11 @@ class Configuration:
 		file_path = self.configs_path / 'reports.json'
 		return self._get_config_data(file_path)["data"]
 
+	@property
+	def macros_config(self) -> list[dict]:
+		file_path = self.configs_path / 'macros.json'
+		return self._get_config_data(file_path)["data"]
+
 	@property
 	def settings_config(self) -> SettingsStructure:
 		file_path = self.configs_path / 'settings.json'
@@ -853,138 +899,79 @@ class HorizontalScrollArea(QScrollArea):
 		super().enterEvent(event)
 
 
-class Mouse:
+def physical_to_logical(x: int, y: int, width: int, height: int) -> tuple[int, int, int, int]:
 	"""
-	It simulates the mouse.
-	Attributes:
-	- MOUSEEVENTF_MOVE (int): Mouse move event flag.
-	- MOUSEEVENTF_LEFTDOWN (int): Left button down event flag.
-	- MOUSEEVENTF_LEFTUP (int): Left button up event flag.
-	- MOUSEEVENTF_RIGHTDOWN (int): Right button down event flag.
-	- MOUSEEVENTF_RIGHTUP (int): Right button up event flag.
-	- MOUSEEVENTF_MIDDLEDOWN (int): Middle button down event flag.
-	- MOUSEEVENTF_MIDDLEUP (int): Middle button up event flag.
-	- MOUSEEVENTF_WHEEL (int): Wheel button rolled event flag.
-	- MOUSEEVENTF_ABSOLUTE (int): Absolute move event flag.
-	- SM_CXSCREEN (int): System metric for screen width.
-	- SM_CYSCREEN (int): System metric for screen height.
-	Methods:
-	- _do_event(flags, x_pos, y_pos, data, extra_info): Generate a mouse event.
-	- _get_button_value(button_name, button_up=False): Convert button name to the corresponding value.
-	- move_mouse(pos): Move the mouse to the specified coordinates.
-	- press_button(pos=(-1, -1), button_name="left", button_up=False): Push a mouse button.
-	- click(pos=(-1, -1), button_name="left"): Click at the specified position.
-	- get_position(): Get the current mouse position.
-	"""
-
-	MOUSEEVENTF_MOVE = 0x0001
-	MOUSEEVENTF_LEFTDOWN = 0x0002
-	MOUSEEVENTF_LEFTUP = 0x0004
-	MOUSEEVENTF_RIGHTDOWN = 0x0008
-	MOUSEEVENTF_RIGHTUP = 0x0010
-	MOUSEEVENTF_MIDDLEDOWN = 0x0020
-	MOUSEEVENTF_MIDDLEUP = 0x0040
-	MOUSEEVENTF_WHEEL = 0x0800
-	MOUSEEVENTF_ABSOLUTE = 0x8000
-	SM_CXSCREEN = 0
-	SM_CYSCREEN = 1
-
-
-	def _do_event(self, flags, x_pos, y_pos, data, extra_info):
-		"""
-		Generate a mouse event.
-		Args:
-		- flags (int): Mouse event flags.
-		- x_pos (int): X-coordinate for the event.
-		- y_pos (int): Y-coordinate for the event.
-		- data (int): Additional data for the event.
-		- extra_info (int): Extra information for the event.
-		Returns:
-		- int: Result of the mouse event generation.
-		"""
-		x_calc = int(65536 * x_pos / windll.user32.GetSystemMetrics(self.SM_CXSCREEN) + 1)
-		y_calc = int(65536 * y_pos / windll.user32.GetSystemMetrics(self.SM_CYSCREEN) + 1)
-		return windll.user32.mouse_event(flags, x_calc, y_calc, data, extra_info)
-
-
-	def _get_button_value(self, button_name, button_up=False):
-		"""
-		Convert the name of the button into the corresponding value.
-		Args:
-		- button_name (str): Name of the button.
-		- button_up (bool): Whether the button is released.
-		Returns:
-		- int: Corresponding value of the button.
-		"""
-		buttons = self.MOUSEEVENTF_RIGHTDOWN if button_name.find("right") >= 0 else 0
-		if button_name.find("left") >= 0:
-			buttons = buttons + self.MOUSEEVENTF_LEFTDOWN
-		if button_name.find("middle") >= 0:
-			buttons = buttons + self.MOUSEEVENTF_MIDDLEDOWN
-		if button_up:
-			buttons = buttons << 1
-		return buttons
-
+	Convert a rectangle in physical screen pixels to Qt's logical coordinates.
 
-	def move(self, pos):
-		"""
-		Move the mouse to the specified coordinates.
-		Args:
-		- pos (tuple): Tuple containing X and Y coordinates.
-		Returns:
-		- None
-		"""
-		(x, y) = pos
-		old_pos = self.get_position()
-		x = x if (x != -1) else old_pos[0]
-		y = y if (y != -1) else old_pos[1]
-		self._do_event(self.MOUSEEVENTF_MOVE + self.MOUSEEVENTF_ABSOLUTE, x, y, 0, 0)
-
-
-	def press_button(self, pos=(-1, -1), button_name="left", button_up=False):
-		"""
-		Push a button of the mouse.
-		Args:
-		- pos (tuple): Tuple containing X and Y coordinates.
-		- button_name (str): Name of the button.
-		- button_up (bool): Whether the button is released.
-		Returns:
-		- None
-		"""
-		self.move(pos)
-		self._do_event(self._get_button_value(button_name, button_up), 0, 0, 0, 0)
-
-
-	def click(self, pos=(-1, -1), button_name="left"):
-		"""
-		Click at the specified place.
-		Args:
-		- pos (tuple): Tuple containing X and Y coordinates.
-		- button_name (str): Name of the button.
-		Returns:
-		- None
-		"""
-		self.move(pos)
-		self._do_event(self._get_button_value(button_name, False) + self._get_button_value(button_name, True), 0, 0, 0, 0)
-
-
-	def get_position(self):
-		"""
-		Get the mouse position.
-		Returns:
-		- tuple: Tuple containing X and Y coordinates of the mouse position.
-		"""
-		point = POINT()
-		windll.user32.GetCursorPos(pointer(point))
-		return point.x, point.y
-
-
-class POINT(Structure):
+	Qt keeps every screen's top-left corner at its native position and scales what is
+	inside it by that screen's device pixel ratio, so the conversion is made relative
+	to the screen containing the rectangle's center, never to the desktop origin.
+	Args:
+	- x, y (int): Top-left corner in physical pixels.
+	- width, height (int): Size in physical pixels.
+	Returns:
+	- tuple[int, int, int, int]: Logical x, y, width and height.
 	"""
-	Structure representing a point with X and Y coordinates.
-	Attributes:
-	- x (c_ulong): X-coordinate.
-	- y (c_ulong): Y-coordinate.
+	center = QPoint(x + width // 2, y + height // 2)
+	screen = QGuiApplication.primaryScreen()
+	for candidate in QGuiApplication.screens():
+		origin = candidate.geometry().topLeft()
+		native_size = candidate.geometry().size() * candidate.devicePixelRatio()
+		if QRect(origin, native_size).contains(center):
+			screen = candidate
+			break
+	if screen is None:
+		return x, y, width, height
+	ratio = screen.devicePixelRatio()
+	origin = screen.geometry().topLeft()
+	return (
+		origin.x() + round((x - origin.x()) / ratio),
+		origin.y() + round((y - origin.y()) / ratio),
+		round(width / ratio),
+		round(height / ratio),
+	)
+
+
+class GeometryBatch:
+	"""
+	Applies a window's geometry once per event-loop iteration.
+
+	`request` only records the target rectangle. The first request of an iteration
+	schedules a zero-timeout timer, and later ones just replace the target while it is
+	pending, so a burst of updates during a drag ends in a single resize-and-move with
+	one repaint.
 	"""
-	_fields_ = [("x", c_ulong), ("y", c_ulong)]
 
+	def __init__(self, widget: QWidget):
+		self.widget = widget
+		self.requested = 0
+		self.applied = 0
+		self._target: QRect | None = None
+		self._timer = QTimer(widget)
+		self._timer.setSingleShot(True)
+		self._timer.setInterval(0)
+		self._timer.timeout.connect(self.apply)
+
+	@property
+	def pending(self) -> bool:
+		return self._target is not None
+
+	def request(self, x: int, y: int, width: int, height: int):
+		self.requested += 1
+		self._target = QRect(x, y, max(0, width), max(0, height))
+		if not self._timer.isActive():
+			self._timer.start()
+
+	def apply(self):
+		target, self._target = self._target, None
+		if target is None or target == self.widget.geometry():
+			return
+		self.applied += 1
+		# Updates are held back until both size and position are set, so there is one repaint
+		self.widget.setUpdatesEnabled(False)
+		try:
+			self.widget.setMinimumSize(target.size())
+			self.widget.setMaximumSize(target.size())
+			self.widget.setGeometry(target)
+		finally:
+			self.widget.setUpdatesEnabled(True)
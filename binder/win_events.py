@@ -0,0 +1,97 @@
+from ctypes import byref
+from ctypes import wintypes
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+try:
+	from ctypes import WINFUNCTYPE, windll
+except ImportError:  # Not Windows: the listener never starts
+	from ctypes import CFUNCTYPE as WINFUNCTYPE
+	windll = None
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_MINIMIZESTART = 0x0016
+EVENT_SYSTEM_MINIMIZEEND = 0x0017
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+WM_QUIT = 0x0012
+
+WinEventProc = WINFUNCTYPE(
+	None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+)
+
+
+if windll is not None:
+	user32 = windll.user32
+	kernel32 = windll.kernel32
+
+	user32.SetWinEventHook.restype = wintypes.HANDLE
+	user32.SetWinEventHook.argtypes = [
+		wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc, wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+	]
+	user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+	user32.PostThreadMessageW.argtypes = [wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+
+
+class WinEventListener(QThread):
+	"""
+	Runs a Win32 message loop that receives window events.
+
+	Hooks are installed and removed on the listener's own thread, which is the
+	thread Windows delivers their callbacks to. They are out-of-context WinEvent
+	hooks, delivered asynchronously, so a slow Python callback never holds up the
+	input or windows it observes; there is deliberately no low-level input hook.
+	Receivers that have no event loop of their own should connect with
+	Qt.ConnectionType.DirectConnection.
+	Signals:
+	- win_event(int, object): Event id and window handle.
+	- foreground_changed(object): Handle of the new foreground window.
+	"""
+	win_event = pyqtSignal(int, object)
+	foreground_changed = pyqtSignal(object)
+
+	def __init__(self, win_events: tuple[int, ...] = (EVENT_SYSTEM_FOREGROUND,), process_id: int = 0):
+		super().__init__()
+		self.win_events = win_events
+		self.process_id = process_id
+		self._thread_id = 0
+		self._stopping = False
+		# Keep references to the callbacks, otherwise ctypes frees them while hooked
+		self._win_event_proc = WinEventProc(self._on_win_event)
+
+	def _on_win_event(self, hook, event, hwnd, id_object, id_child, event_thread, event_time):
+		if id_object != OBJID_WINDOW or id_child != CHILDID_SELF or not hwnd:
+			return
+		self.win_event.emit(event, hwnd)
+		if event == EVENT_SYSTEM_FOREGROUND:
+			self.foreground_changed.emit(hwnd)
+
+	def run(self):
+		if windll is None:
+			return
+		self._thread_id = kernel32.GetCurrentThreadId()
+		flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+		event_hooks = [
+			user32.SetWinEventHook(event, event, None, self._win_event_proc, self.process_id, 0, flags)
+			for event in self.win_events
+		]
+
+		message = wintypes.MSG()
+		try:
+			while not self._stopping and user32.GetMessageW(byref(message), None, 0, 0) > 0:
+				user32.TranslateMessage(byref(message))
+				user32.DispatchMessageW(byref(message))
+		finally:
+			for hook in event_hooks:
+				if hook:
+					user32.UnhookWinEvent(hook)
+			self._thread_id = 0
+
+	def stop(self):
+		self._stopping = True
+		if self._thread_id:
+			user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+		self.wait()
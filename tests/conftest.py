@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# The app imports its modules as top-level names from the binder directory
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "binder"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Configuration keeps its data directory under the working directory
+os.chdir(tempfile.mkdtemp(prefix="binder-tests-"))
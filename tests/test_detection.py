@@ -0,0 +1,136 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from capture import FakeCaptureBackend
+from detection import PROBE_TABLE, FrameChangeGate, TabDetector, TabStateDebouncer
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+# Size of the fixture images, which stand in for the game's client area
+WIDTH, HEIGHT = 960, 420
+
+
+def load_png(name: str, left: int = 0, top: int = 0) -> FakeCaptureBackend:
+	return FakeCaptureBackend.from_png(FIXTURES / f"{name}.png", left, top)
+
+
+def png_pixels(name: str) -> np.ndarray:
+	# Frames are BGRA, set_pixels takes RGB
+	return load_png(name).capture(0, 0, WIDTH, HEIGHT).pixels[..., 2::-1]
+
+
+def evaluate_png(name: str, left: int = 0, top: int = 0) -> dict[str, bool]:
+	capture_backend = FakeCaptureBackend.from_png(FIXTURES / f"{name}.png", left, top)
+	xs, ys = PROBE_TABLE.get_positions(left + WIDTH, top + HEIGHT, left, top)
+	return PROBE_TABLE.evaluate(capture_backend.read_pixels(xs, ys))
+
+
+@pytest.mark.parametrize(("name", "open_tabs"), [
+	("closed", set()),
+	("console_open", {"console_tab"}),
+	("console_reports_open", {"console_tab", "reports_tab"}),
+])
+def test_probe_table_evaluate(name, open_tabs):
+	tabs_state = evaluate_png(name)
+	assert set(tabs_state) == set(PROBE_TABLE.tab_names)
+	assert {tab_name for tab_name, is_open in tabs_state.items() if is_open} == open_tabs
+
+
+def test_probe_table_follows_window_origin():
+	assert evaluate_png("console_open", left=1920, top=200)["console_tab"]
+
+
+def test_probe_table_tolerance():
+	capture_backend = FakeCaptureBackend.from_png(FIXTURES / "console_open.png")
+	xs, ys = PROBE_TABLE.get_positions(WIDTH, HEIGHT, 0, 0)
+	colors = capture_backend.read_pixels(xs, ys).astype(int)
+	console_probes = PROBE_TABLE.tab_groups[PROBE_TABLE.tab_names.index("console_tab")]
+	colors[console_probes] -= 5
+	assert PROBE_TABLE.evaluate(colors)["console_tab"]
+	colors[console_probes[0]] -= 1
+	assert not PROBE_TABLE.evaluate(colors)["console_tab"]
+
+
+def test_debouncer_opens_on_first_sample():
+	debouncer = TabStateDebouncer(["console_tab"])
+	assert debouncer.update({"console_tab": True}, now=0.0) == {"console_tab": True}
+	assert not debouncer.pending
+
+
+def test_debouncer_closes_after_samples_and_dwell():
+	debouncer = TabStateDebouncer(["console_tab"], close_samples=2, close_dwell=0.3)
+	debouncer.update({"console_tab": True}, now=0.0)
+	# Two samples, but not yet 0.3 s apart
+	assert debouncer.update({"console_tab": False}, now=1.0)["console_tab"]
+	assert debouncer.update({"console_tab": False}, now=1.1)["console_tab"]
+	assert debouncer.pending
+	assert not debouncer.update({"console_tab": False}, now=1.3)["console_tab"]
+	assert not debouncer.pending
+
+
+def test_debouncer_ignores_single_bad_read():
+	debouncer = TabStateDebouncer(["console_tab"], close_samples=2, close_dwell=0.3)
+	debouncer.update({"console_tab": True}, now=0.0)
+	debouncer.update({"console_tab": False}, now=1.0)
+	assert debouncer.update({"console_tab": True}, now=1.1)["console_tab"]
+	# The earlier miss no longer counts towards closing
+	assert debouncer.update({"console_tab": False}, now=1.5)["console_tab"]
+	assert debouncer.update({"console_tab": False}, now=1.6)["console_tab"]
+	assert not debouncer.update({"console_tab": False}, now=1.8)["console_tab"]
+
+
+def test_change_gate_fingerprint():
+	change_gate = FrameChangeGate(radius=4, step=2)
+	assert len(change_gate.offsets_x) == 25
+	assert (change_gate.offsets_x[change_gate.center], change_gate.offsets_y[change_gate.center]) == (0, 0)
+	colors = np.zeros((50, 3), dtype=np.uint8)
+	assert change_gate.update(colors)
+	assert not change_gate.update(colors)
+	colors[7] = 1
+	assert change_gate.update(colors)
+	assert (change_gate.hits, change_gate.misses) == (1, 2)
+	change_gate.reset()
+	assert change_gate.update(colors)
+
+
+def test_detector_skips_unchanged_frames():
+	capture_backend = load_png("console_open")
+	change_gate = FrameChangeGate()
+	detector = TabDetector(capture_backend, change_gate=change_gate)
+	detector.set_geometry(0, 0, WIDTH, HEIGHT)
+	assert detector.detect()["console_tab"]
+	assert detector.last_frame is not None
+	assert detector.detect() is None
+	capture_backend.set_pixels(png_pixels("console_reports_open"))
+	tabs_state = detector.detect()
+	assert tabs_state["console_tab"] and tabs_state["reports_tab"]
+	assert (change_gate.hits, change_gate.misses) == (1, 2)
+	# One capture per tick, probes and gate patches together
+	assert capture_backend.capture_count == 3
+
+
+def test_detector_matches_ungated_evaluation():
+	gated = TabDetector(load_png("console_reports_open"), change_gate=FrameChangeGate())
+	ungated = TabDetector(load_png("console_reports_open"))
+	for detector in (gated, ungated):
+		detector.set_geometry(0, 0, WIDTH, HEIGHT)
+	assert gated.detect() == ungated.detect() == evaluate_png("console_reports_open")
+
+
+def test_detector_without_geometry_reports_closed():
+	detector = TabDetector(load_png("console_open"))
+	assert detector.detect() == PROBE_TABLE.closed_state()
+
+
+def test_detector_debounces_unchanged_frames():
+	capture_backend = load_png("console_open")
+	detector = TabDetector(capture_backend, change_gate=FrameChangeGate(), debouncer=TabStateDebouncer(PROBE_TABLE.tab_names))
+	detector.set_geometry(0, 0, WIDTH, HEIGHT)
+	assert detector.detect(now=0.0)["console_tab"]
+	capture_backend.set_pixels(png_pixels("closed"))
+	assert detector.detect(now=1.0)["console_tab"]
+	assert detector.pending
+	# The frame no longer changes, but the pending close still needs its samples
+	assert detector.detect(now=1.2)["console_tab"]
+	assert not detector.detect(now=1.4)["console_tab"]
+	assert detector.detect(now=1.6) is None
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+from capture import FakeCaptureBackend
+from coordinate_updater import FakeWindowEventSource, GameWindow
+
+# GameProcessMonitor looks the game up through the native binder_utils module
+pytest.importorskip("binder_utils")
+from game_process import GameProcessMonitor
+from game_state import GameStateHub
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+HWND, PROCESS_ID = 0x50A12, 4242
+
+
+def game_window(left: int, top: int, width: int = 960, height: int = 420) -> GameWindow:
+	return GameWindow(hwnd=HWND, process_id=PROCESS_ID, left=left, top=top, right=left + width, bottom=top + height)
+
+
+@pytest.fixture
+def hub():
+	process_monitor = GameProcessMonitor(manage_priority=False)
+	event_source = FakeWindowEventSource()
+	hub = GameStateHub(process_monitor, event_source=event_source)
+	snapshots = []
+	hub.snapshot_changed.connect(snapshots.append)
+	hub.snapshots = snapshots
+	yield hub
+	hub.stop_detection()
+
+
+def test_tick_follows_process_window_and_events(hub):
+	capture_backend = FakeCaptureBackend.from_png(FIXTURES / "console_open.png")
+	hub.start_detection(capture_backend)
+	# Off Windows the tracker never enumerates, so the test supplies the window
+	hub.window_tracker.windows = {HWND: game_window(0, 0)}
+	hub.process_monitor.process = (PROCESS_ID,)
+
+	hub.tick()
+	snapshot = hub.snapshots[-1]
+	assert (snapshot.process_id, snapshot.hwnd, snapshot.window_rect) == (PROCESS_ID, HWND, (0, 0, 960, 420))
+	assert snapshot.tabs_state["console_tab"] and not snapshot.tabs_state["reports_tab"]
+	assert hub.event_source.tracked_process_ids == {PROCESS_ID}
+
+	# The window moves: the event marks it dirty and the next tick re-reads it
+	hub.window_tracker.windows = {HWND: game_window(300, 200)}
+	capture_backend.left, capture_backend.top = 300, 200
+	hub.event_source.fire(HWND)
+	assert hub._geometry_dirty.is_set()
+	hub.tick()
+	assert not hub._geometry_dirty.is_set()
+	snapshot = hub.snapshots[-1]
+	assert snapshot.window_rect == (300, 200, 1260, 620)
+	assert snapshot.tabs_state["console_tab"]
+
+	# Nothing changed: no new snapshot
+	published = len(hub.snapshots)
+	hub.tick()
+	assert len(hub.snapshots) == published
+
+	hub.process_monitor.process = None
+	hub.tick()
+	snapshot = hub.snapshots[-1]
+	assert not snapshot.running
+	assert not any(snapshot.tabs_state.values())
+	assert hub.event_source.tracked_process_ids == set()
+
+
+def test_abandoned_generation_never_publishes(hub):
+	hub.start_detection(FakeCaptureBackend.from_png(FIXTURES / "console_open.png"))
+	hub.window_tracker.windows = {HWND: game_window(0, 0)}
+	hub.process_monitor.process = (PROCESS_ID,)
+	hub.tick(generation=hub._generation - 1)
+	assert hub.snapshots == []
@@ -0,0 +1,59 @@
+import pytest
+from macros import MacroRun, compile_macro
+from utils import default_macros
+
+
+def test_default_macros_compile():
+	for config in default_macros():
+		macro = compile_macro(config)
+		assert macro.name == config["name"]
+		assert len(macro.steps) == len(config["steps"])
+		assert macro.fields <= {"user_gid", "gid"}
+
+
+def test_step_fields_and_waits():
+	macro = compile_macro({
+		"name": "report",
+		"steps": [
+			{"command": "tp {gid}", "ready": "teleport_tab"},
+			{"command": "mute {gid} {time} {reason}", "wait": 0.5},
+		],
+	})
+	first, second = macro.steps
+	assert first.fields == {"gid"} and first.wait is None and first.ready == "teleport_tab"
+	assert second.fields == {"gid", "time", "reason"} and second.wait == 0.5 and second.ready is None
+	assert macro.fields == {"gid", "time", "reason"}
+
+
+def test_unknown_placeholder():
+	with pytest.raises(ValueError, match="unknown placeholders"):
+		compile_macro({"name": "bad", "steps": [{"command": "tpcar {vehicle}"}]})
+
+
+def test_unknown_ready_tab():
+	with pytest.raises(ValueError, match="unknown tab"):
+		compile_macro({"name": "bad", "steps": [{"command": "tpcar {gid}", "ready": "inventory"}]})
+
+
+def test_run_times_steps_and_skips_stale_readiness():
+	pasted = []
+	probe_calls = []
+
+	def opens_after_paste():
+		probe_calls.append(len(pasted))
+		return len(pasted) >= 2
+
+	run = MacroRun("sync", [
+		("dimension 1 1", lambda: pasted.append(1), 0.05, lambda: True),
+		("tpcar 7", lambda: pasted.append(2), 1.0, opens_after_paste),
+	], ready_timeout=0.5)
+	run()
+	assert pasted == [1, 2]
+	first, second = run.timings
+	# An already open tab carries no signal: the full pause applies
+	assert not first.ready and first.wait_seconds >= 0.05
+	assert second.ready and second.wait_seconds < 0.5
+	assert probe_calls[0] == 1
+	assert run.report().startswith("Macro sync: ")
+	assert "'dimension 1 1'" in run.report() and "(no readiness)" in run.report()
+
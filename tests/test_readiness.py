@@ -0,0 +1,31 @@
+from pathlib import Path
+
+from capture import FakeCaptureBackend
+from layout import ScreenLayout
+from readiness import TabReadyProbe, console_input_probe, pending_readiness
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+LAYOUT = ScreenLayout(0, 0, 960, 420)
+
+
+def fake_backend(name: str) -> FakeCaptureBackend:
+	return FakeCaptureBackend.from_png(FIXTURES / f"{name}.png")
+
+
+def test_tab_probe():
+	assert TabReadyProbe("console_tab", LAYOUT, capture_backend=fake_backend("console_reports_open"))()
+	assert not TabReadyProbe("console_tab", LAYOUT, capture_backend=fake_backend("closed"))()
+
+
+def test_console_input_probe():
+	assert console_input_probe(LAYOUT, fake_backend("console_open"))()
+	# The console tab still matches under the reports tab, but its input is covered
+	assert not console_input_probe(LAYOUT, fake_backend("console_reports_open"))()
+	assert not console_input_probe(LAYOUT, fake_backend("closed"))()
+
+
+def test_pending_readiness():
+	probe = console_input_probe(LAYOUT, fake_backend("console_reports_open"))
+	assert pending_readiness(probe) is probe
+	assert pending_readiness(console_input_probe(LAYOUT, fake_backend("console_open"))) is None
+	assert pending_readiness(None) is None
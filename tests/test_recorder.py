@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import numpy as np
+from capture import FakeCaptureBackend
+from detection import PROBE_TABLE, FrameChangeGate, TabDetector
+from recorder import DetectionRecorder, read_recording, replay
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+WIDTH, HEIGHT = 960, 420
+# Fixture shown and for how many seconds
+SESSION = [("closed", 1.0), ("console_open", 2.0), ("console_reports_open", 1.0), ("console_open", 1.0), ("closed", 1.0)]
+
+
+def record_session(path: Path, interval: float = 0.1) -> list[dict[str, bool]]:
+	frames = {name: FakeCaptureBackend.from_png(FIXTURES / f"{name}.png") for name, _ in SESSION}
+	capture_backend = FakeCaptureBackend(np.zeros((1, 1, 3), dtype=np.uint8))
+	detector = TabDetector(capture_backend)
+	detector.set_geometry(0, 0, WIDTH, HEIGHT)
+	recorder = DetectionRecorder(path, PROBE_TABLE.tab_names)
+	states = []
+	now = 0.0
+	for name, duration in SESSION:
+		capture_backend.set_pixels(frames[name].capture(0, 0, WIDTH, HEIGHT).pixels[..., 2::-1])
+		for _ in range(round(duration / interval)):
+			tabs_state = detector.detect()
+			recorder.record(detector.geometry, detector.last_frame, tabs_state, now)
+			states.append(tabs_state)
+			now += interval
+	recorder.close()
+	return states
+
+
+def test_recording_round_trip(tmp_path):
+	path = tmp_path / "session.binrec"
+	states = record_session(path)
+	tab_names, ticks = read_recording(path)
+	assert tab_names == PROBE_TABLE.tab_names
+	# Only changes are written
+	assert [tick.tabs_state for tick in ticks] == [states[0], *(b for a, b in zip(states, states[1:]) if a != b)]
+	assert ticks[0].window_rect == (0, 0, WIDTH, HEIGHT)
+	last = ticks[-1]
+	pixels = last.get_pixels()
+	assert pixels.shape == (last.capture_rect[3], last.capture_rect[2], 3)
+	assert not pixels.any()
+
+
+def test_replay_follows_recording(tmp_path):
+	path = tmp_path / "session.binrec"
+	record_session(path)
+	report = replay(path, interval=0.1, change_gate=FrameChangeGate())
+	assert report.ticks > 0
+	assert (report.false_transitions, report.missed_transitions, report.suppressed_transitions) == (0, 0, 0)
+	# console opens, reports opens and closes, console closes
+	assert len(report.latencies) == 4
+	assert max(report.latencies) <= 0.5
+	# Recording stops while nothing changes, so most replayed ticks see an unchanged frame
+	assert report.gate_hits > report.gate_misses > 0
+	assert "Change gate:" in report.summary()
+
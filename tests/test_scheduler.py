@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+from scheduler import AdaptivePollScheduler
+
+
+def make_scheduler(**kwargs) -> AdaptivePollScheduler:
+	settings = dict(min_interval=0.2, max_interval=1.0, burst_interval=0.05, burst_duration=1.5, backoff_factor=2.0, confirm_delay=0.15)
+	settings.update(kwargs)
+	return AdaptivePollScheduler(**settings)
+
+
+def test_backs_off_while_unchanged():
+	scheduler = make_scheduler()
+	assert scheduler.interval == pytest.approx(0.2)
+	scheduler.record(False)
+	assert scheduler.interval == pytest.approx(0.4)
+	scheduler.record(False)
+	scheduler.record(False)
+	assert scheduler.interval == pytest.approx(1.0)
+	scheduler.record(True)
+	assert scheduler.interval == pytest.approx(0.2)
+
+
+def test_burst_shortens_interval():
+	scheduler = make_scheduler()
+	scheduler.record(False)
+	scheduler.burst()
+	assert scheduler.interval == pytest.approx(0.05)
+	scheduler = make_scheduler(burst_duration=0.0)
+	scheduler.burst()
+	assert scheduler.interval == pytest.approx(0.2)
+
+
+def test_trigger_schedules_confirmation():
+	scheduler = make_scheduler()
+	scheduler.record(False)
+	scheduler.record(False)
+	scheduler.trigger()
+	assert scheduler.interval <= 0.15
+	# The trigger also wakes the loop for an immediate check
+	started = time.monotonic()
+	scheduler.wait(5.0)
+	assert time.monotonic() - started < 1.0
+
+
+def test_stop_wakes_parked_loop():
+	scheduler = make_scheduler()
+	results = []
+	loop = threading.Thread(target=lambda: results.append(scheduler.park()), daemon=True)
+	loop.start()
+	time.sleep(0.05)
+	assert loop.is_alive()
+	scheduler.stop()
+	loop.join(1)
+	assert results == [False]
+	assert not scheduler.running
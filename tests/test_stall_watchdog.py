@@ -0,0 +1,73 @@
+from stall_watchdog import Heartbeat, Watchdog
+
+
+def stall(heartbeat: Heartbeat, since: float) -> None:
+	# A tick that started at `since` and never returned
+	heartbeat.tick_started = since
+
+
+def test_restart_backoff():
+	heartbeat = Heartbeat("detection")
+	restarts = []
+	watchdog = Watchdog(min_backoff=2.0, max_backoff=8.0)
+	watchdog.watch(heartbeat, lambda: restarts.append(True), timeout=5.0)
+	loop = watchdog.loops[0]
+
+	stall(heartbeat, 0.0)
+	watchdog.check(4.0)
+	assert not restarts
+	watchdog.check(5.0)
+	assert len(restarts) == 1
+	assert heartbeat.tick_started is None
+	assert (loop.next_restart_at, loop.backoff) == (7.0, 4.0)
+
+	# The replacement stalls at once: the next restart waits out the backoff
+	stall(heartbeat, 5.0)
+	watchdog.check(10.0)
+	assert len(restarts) == 2
+	assert (loop.next_restart_at, loop.backoff) == (14.0, 8.0)
+	stall(heartbeat, 10.0)
+	watchdog.check(15.0)
+	assert len(restarts) == 3
+	assert (loop.next_restart_at, loop.backoff) == (23.0, 8.0)
+	stall(heartbeat, 15.0)
+	watchdog.check(20.0)
+	assert len(restarts) == 3
+
+
+def test_backoff_resets_after_healthy_ticks():
+	heartbeat = Heartbeat("detection")
+	watchdog = Watchdog(min_backoff=2.0, max_backoff=8.0)
+	watchdog.watch(heartbeat, lambda: None, timeout=5.0)
+	loop = watchdog.loops[0]
+	stall(heartbeat, 0.0)
+	watchdog.check(5.0)
+	assert loop.backoff == 4.0
+	with heartbeat.tick():
+		pass
+	watchdog.check(6.0)
+	assert loop.backoff == 2.0
+
+
+def test_stalled_signal_and_failing_restart():
+	heartbeat = Heartbeat("game-process")
+	watchdog = Watchdog()
+	stalls = []
+	watchdog.stalled.connect(lambda name, seconds: stalls.append((name, seconds)))
+
+	def restart():
+		raise RuntimeError("restart failed")
+
+	watchdog.watch(heartbeat, restart, timeout=1.0)
+	stall(heartbeat, 0.0)
+	watchdog.check(1.5)
+	assert stalls == [("game-process", 1.5)]
+	assert watchdog.loops[0].restarts == 1
+
+
+def test_heartbeat_ignores_time_between_ticks():
+	heartbeat = Heartbeat("detection")
+	with heartbeat.tick():
+		pass
+	assert heartbeat.ticks == 1
+	assert heartbeat.stalled_for(1e9) == 0.0
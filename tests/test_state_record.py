@@ -0,0 +1,37 @@
+import threading
+import time
+
+from recorder import decode_tabs_state, encode_tabs_state
+from state_record import NO_PROCESS, SEQUENCE, STATE_RECORD, read_record, write_record
+
+FIELDS = (1234, 0x50A12, -8, -31, 1912, 1049, 144, 0b101)
+
+
+def test_round_trip():
+	buffer = bytearray(STATE_RECORD.size)
+	assert read_record(buffer) == (0, (0,) * 8)
+	write_record(buffer, 0, FIELDS)
+	assert read_record(buffer) == (1, FIELDS)
+	write_record(buffer, 2, (NO_PROCESS, 0, 0, 0, 0, 0, 0, 0))
+	assert read_record(buffer) == (2, (NO_PROCESS, 0, 0, 0, 0, 0, 0, 0))
+
+
+def test_tabs_mask_round_trip():
+	tab_names = ["admin_panel", "console_tab", "reports_tab"]
+	tabs_state = {"admin_panel": False, "console_tab": True, "reports_tab": True}
+	assert decode_tabs_state(tab_names, encode_tabs_state(tab_names, tabs_state)) == tabs_state
+
+
+def test_reader_waits_for_write_in_progress():
+	buffer = bytearray(STATE_RECORD.size)
+	write_record(buffer, 0, FIELDS)
+	# A writer that stopped halfway: odd sequence, fields already replaced
+	STATE_RECORD.pack_into(buffer, 0, 3, *FIELDS[:-1], 0)
+	result = []
+	reader = threading.Thread(target=lambda: result.append(read_record(buffer)), daemon=True)
+	reader.start()
+	time.sleep(0.05)
+	assert reader.is_alive()
+	SEQUENCE.pack_into(buffer, 0, 4)
+	reader.join(1)
+	assert result == [(2, (*FIELDS[:-1], 0))]